@@ -0,0 +1,128 @@
+"""
+JWT authentication without a user query per request.
+
+Access tokens carry the user fields requests rely on (username, timezone,
+staff flags) plus the user's updated_at as a version claim. Each user's
+current version, active flag and staff flags are cached in this process for
+AUTH_USER_CACHE_TTL seconds and in the shared cache for
+AUTH_USER_STATE_TIMEOUT seconds; the User signals drop both on change.
+
+When the token's version and staff flags match, the request user is built
+from the claims as a User instance whose other fields are deferred, so they
+are loaded on first access. Stale claims (the profile changed after the token
+was issued) fall back to the regular database lookup until the token is
+refreshed. The flags are compared on their own because queryset .update()
+changes neither updated_at nor sends signals; such changes apply once the
+cached state expires. Inactive users are rejected from the cached state.
+"""
+
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+STATE_KEY = 'accounts:auth:{user_id}'
+
+# User fields copied into access tokens
+CLAIM_FIELDS = ['username', 'timezone', 'is_staff', 'is_superuser']
+# Claim fields that grant permissions, checked against the cached state
+STATE_FLAGS = ['is_staff', 'is_superuser']
+VERSION_CLAIM = 'ver'
+
+# Process-local {user_id: (expires_at, state)}; cleared when it grows past this
+LOCAL_CACHE_SIZE = 10000
+_local_states = {}
+
+
+class UserClaimsRefreshToken(RefreshToken):
+    """Refresh token (and derived access tokens) carrying the user claims."""
+    
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_user_claims(token, user)
+        return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication serving the request user from token claims."""
+    
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            # Issued before claims were added
+            return super().get_user(validated_token)
+        
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            return super().get_user(validated_token)
+        
+        state = get_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not state['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if validated_token[VERSION_CLAIM] != state['version'] or api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+        if any(validated_token.get(flag) != state.get(flag) for flag in STATE_FLAGS):
+            return super().get_user(validated_token)
+        
+        return _user_from_claims(user_id, validated_token)
+
+
+def set_user_claims(token, user):
+    """Copy the claim fields and version of user into token."""
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[VERSION_CLAIM] = _version(user.updated_at)
+
+
+def get_state(user_id):
+    """
+    {'version', 'is_active', 'is_staff', 'is_superuser'} of a user from the
+    local cache, shared cache or database.
+    """
+    now = time.monotonic()
+    entry = _local_states.get(user_id)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+    
+    key = STATE_KEY.format(user_id=user_id)
+    state = cache.get(key)
+    if state is None:
+        row = User.objects.filter(pk=user_id).values('updated_at', 'is_active', *STATE_FLAGS).first()
+        if row is None:
+            return None
+        state = {'version': _version(row.pop('updated_at')), **row}
+        cache.set(key, state, timeout=settings.AUTH_USER_STATE_TIMEOUT)
+    
+    if len(_local_states) >= LOCAL_CACHE_SIZE:
+        _local_states.clear()
+    _local_states[user_id] = (now + settings.AUTH_USER_CACHE_TTL, state)
+    return state
+
+
+def invalidate_state(user_id):
+    """Forget a user's cached state here and in the shared cache."""
+    _local_states.pop(user_id, None)
+    cache.delete(STATE_KEY.format(user_id=user_id))
+
+
+def _user_from_claims(user_id, token):
+    values = {'id': user_id, 'is_active': True}
+    values.update((field, token[field]) for field in CLAIM_FIELDS)
+    
+    # Same construction as a queryset using .only(): unlisted fields are deferred
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    return User.from_db('default', names, [values[name] for name in names])
+
+
+def _version(updated_at):
+    return int(updated_at.timestamp() * 1000)
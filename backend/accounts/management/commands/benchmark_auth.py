@@ -0,0 +1,73 @@
+import statistics
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from accounts.authentication import CachedJWTAuthentication, UserClaimsRefreshToken
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare request latency and queries per request with the stock "
+        "JWTAuthentication and CachedJWTAuthentication, in-process. Requests "
+        "send If-None-Match once the ETag is known, so conditional endpoints "
+        "answer 304 and authentication dominates."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/migraine-events/', help="GET path to request")
+        parser.add_argument('--requests', type=int, default=2000, help="Timed requests per class")
+        parser.add_argument('--user', type=int, help="User ID to authenticate as (default: first active user)")
+    
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True).order_by('id')
+        user = users.filter(pk=options['user']).first() if options['user'] else users.first()
+        if user is None:
+            raise CommandError("No active user to authenticate as.")
+        token = str(UserClaimsRefreshToken.for_user(user).access_token)
+        
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '') and not host.startswith('.')), 'localhost')
+        client = Client(HTTP_HOST=host, HTTP_AUTHORIZATION=f'Bearer {token}')
+        
+        original = APIView.authentication_classes
+        try:
+            for auth_class in (JWTAuthentication, CachedJWTAuthentication):
+                APIView.authentication_classes = [auth_class]
+                self._run(auth_class.__name__, client, options['path'], options['requests'])
+        finally:
+            APIView.authentication_classes = original
+    
+    def _run(self, label, client, path, count):
+        response = client.get(path)
+        if response.status_code not in (200, 304):
+            raise CommandError(f"GET {path} returned {response.status_code}.")
+        headers = {'If-None-Match': response['ETag']} if response.has_header('ETag') else {}
+        
+        # Warm caches, then time
+        for _ in range(20):
+            client.get(path, headers=headers)
+        queries = []
+        # Counted with a wrapper: request_started resets connection.queries
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            status = client.get(path, headers=headers).status_code
+        
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            client.get(path, headers=headers)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{label} ({status})"))
+        self.stdout.write(
+            f"  queries/request {len(queries)}, median {statistics.median(timings):.3f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.3f} ms, "
+            f"{count / (sum(timings) / 1000):.0f} requests/s"
+        )
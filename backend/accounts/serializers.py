@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import UserClaimsRefreshToken, set_user_claims
 
 User = get_user_model()
 
@@ -42,7 +45,25 @@ class RegisterSerializer(serializers.ModelSerializer):
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Custom JWT token serializer with user data."""
     
+    token_class = UserClaimsRefreshToken
+    
     def validate(self, attrs):
         data = super().validate(attrs)
         data['user'] = UserSerializer(self.user).data
         return data
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh that re-stamps the user claims, so stale access tokens heal on refresh."""
+    
+    token_class = UserClaimsRefreshToken
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is not None:
+            set_user_claims(refresh, user)
+            attrs = {**attrs, 'refresh': str(refresh)}
+        return super().validate(attrs)
@@ -0,0 +1,24 @@
+"""
+Signal handlers keeping the cached auth state of users current.
+
+Queryset .update() calls bypass these; the shared entry then expires after
+AUTH_USER_STATE_TIMEOUT seconds.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import invalidate_state
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_state(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached version and active flag of a changed or deleted user."""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        # Login bookkeeping leaves updated_at and is_active alone
+        return
+    invalidate_state(instance.pk)
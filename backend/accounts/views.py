@@ -31,7 +31,8 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = (IsAuthenticated,)
     
     def get_object(self):
-        return self.request.user
+        # request.user may be built from token claims; updates need the full row
+        return User.objects.get(pk=self.request.user.pk)
 
 
 @api_view(['POST'])
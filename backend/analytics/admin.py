@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserAnalytics
+from .models import UserAnalytics, AnalyticsSnapshot
 
 
 @admin.register(UserAnalytics)
@@ -8,3 +8,10 @@ class UserAnalyticsAdmin(admin.ModelAdmin):
     list_filter = ['period_start', 'period_end']
     search_fields = ['user__username']
     date_hierarchy = 'period_end'
+
+
+@admin.register(AnalyticsSnapshot)
+class AnalyticsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['user', 'kind', 'period_end', 'stale', 'computed_at']
+    list_filter = ['kind', 'stale']
+    search_fields = ['user__username']
@@ -0,0 +1,122 @@
+"""
+Correlation engine for daily log factors and migraine onsets.
+
+For a set of users and a date window, each daily log factor is laid out as a
+(users, days) array with NaN on days without a value, next to a 0/1 array
+marking days on which a migraine started. Point-biserial correlations (Pearson
+r against the binary onset indicator) are computed for all users, factors and
+lags at once: lag k pairs the factor on day d-k with the onset on day d.
+Confidence intervals use the Fisher z-transform.
+"""
+
+import numpy as np
+from datetime import timedelta
+
+from migraine.models import MigraineEvent
+from logs.models import DailyLog
+
+FACTORS = ['sleep_hours', 'stress_level', 'water_intake', 'exercise_duration']
+LAGS = (0, 1, 2)
+
+# Minimum paired days before a coefficient is reported
+MIN_DAYS = 10
+
+# Two-sided 95% normal quantile
+Z_95 = 1.959963984540054
+
+
+def build_arrays(user_ids, start_date, end_date):
+    """
+    Load factor and onset arrays for the window [start_date, end_date].
+    Returns (factors, onsets): float arrays shaped (factors, users, days) and
+    (users, days), with rows in the order of user_ids. Two queries in total.
+    """
+    row_of = {user_id: i for i, user_id in enumerate(user_ids)}
+    days = (end_date - start_date).days + 1
+    
+    factors = np.full((len(FACTORS), len(user_ids), days), np.nan)
+    logs = DailyLog.objects.filter(
+        user_id__in=user_ids,
+        date__gte=start_date,
+        date__lte=end_date
+    ).values_list('user_id', 'date', *FACTORS)
+    for user_id, date, *values in logs.iterator():
+        day = (date - start_date).days
+        factors[:, row_of[user_id], day] = [np.nan if v is None else float(v) for v in values]
+    
+    onsets = np.zeros((len(user_ids), days))
+    onset_days = MigraineEvent.objects.filter(
+        user_id__in=user_ids
+    ).started_between(start_date, end_date).values_list('user_id', 'start_time__date').distinct()
+    for user_id, date in onset_days:
+        onsets[row_of[user_id], (date - start_date).days] = 1
+    
+    return factors, onsets
+
+
+def correlate(factors, onsets, lags=LAGS):
+    """
+    Point-biserial correlations of every factor against onsets per lag.
+    Returns {lag: (r, lower, upper, n)}, each array shaped (factors, users);
+    coefficients are NaN where fewer than MIN_DAYS pairs or no variance.
+    """
+    results = {}
+    for lag in lags:
+        x = factors[:, :, :factors.shape[2] - lag]
+        y = np.broadcast_to(onsets[:, lag:], x.shape)
+        
+        paired = ~np.isnan(x)
+        n = paired.sum(axis=2)
+        safe_n = np.maximum(n, 1)
+        
+        x = np.where(paired, x, 0.0)
+        y = np.where(paired, y, 0.0)
+        x_centered = np.where(paired, x - (x.sum(axis=2) / safe_n)[..., None], 0.0)
+        y_centered = np.where(paired, y - (y.sum(axis=2) / safe_n)[..., None], 0.0)
+        
+        covariance = (x_centered * y_centered).sum(axis=2)
+        spread = np.sqrt((x_centered ** 2).sum(axis=2) * (y_centered ** 2).sum(axis=2))
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = np.where((n >= MIN_DAYS) & (spread > 0), covariance / spread, np.nan)
+            r = np.clip(r, -1.0, 1.0)
+            z = np.arctanh(r)
+            margin = Z_95 / np.sqrt(np.maximum(n - 3, 1))
+            lower = np.tanh(z - margin)
+            upper = np.tanh(z + margin)
+        
+        results[lag] = (r, lower, upper, n)
+    
+    return results
+
+
+def correlate_users(user_ids, end_date, days=90):
+    """Correlation report per user for the `days` days up to end_date."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    
+    factors, onsets = build_arrays(user_ids, end_date - timedelta(days=days - 1), end_date)
+    results = correlate(factors, onsets)
+    
+    reports = {}
+    for i, user_id in enumerate(user_ids):
+        reports[user_id] = {
+            factor: {
+                f'lag_{lag}': _coefficient(results[lag], f, i)
+                for lag in results
+            }
+            for f, factor in enumerate(FACTORS)
+        }
+    return reports
+
+
+def _coefficient(result, f, i):
+    r, lower, upper, n = (array[f, i] for array in result)
+    if np.isnan(r):
+        return {'r': None, 'ci': None, 'n': int(n)}
+    return {
+        'r': round(float(r), 3),
+        'ci': [round(float(lower), 3), round(float(upper), 3)],
+        'n': int(n)
+    }
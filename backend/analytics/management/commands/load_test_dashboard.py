@@ -0,0 +1,90 @@
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+User = get_user_model()
+
+# The requests the home screen fires in parallel
+DASHBOARD_PATHS = [
+    '/api/predictions/today/',
+    '/api/predictions/forecast/',
+    '/api/analytics/summary/',
+    '/api/analytics/patterns/',
+    '/api/analytics/correlations/',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the dashboard endpoints against a running server. Run it once "
+        "against WSGI (e.g. gunicorn migraine_backend.wsgi -w 4 --threads 8) and "
+        "once against ASGI (e.g. uvicorn migraine_backend.asgi:application "
+        "--workers 4) with the same options to compare throughput."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Server base URL")
+        parser.add_argument('--users', type=int, default=50, help="Concurrent simulated users")
+        parser.add_argument('--rounds', type=int, default=10, help="Dashboard loads per user")
+    
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(is_active=True).order_by('id')[:options['users']])
+        if not users:
+            raise CommandError("No active users to authenticate as.")
+        tokens = [str(AccessToken.for_user(users[i % len(users)])) for i in range(options['users'])]
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['users']) as pool:
+            results = list(pool.map(
+                lambda token: self._simulate_user(base_url=options['url'], token=token, rounds=options['rounds']),
+                tokens
+            ))
+        elapsed = time.perf_counter() - started
+        
+        latencies = sorted(latency for user_latencies, _ in results for latency in user_latencies)
+        errors = sum(user_errors for _, user_errors in results)
+        if not latencies:
+            raise CommandError("No successful requests.")
+        
+        self.stdout.write(json.dumps({
+            'requests': len(latencies) + errors,
+            'errors': errors,
+            'seconds': round(elapsed, 2),
+            'requests_per_second': round(len(latencies) / elapsed, 1),
+            'latency_ms': {
+                'median': round(statistics.median(latencies), 1),
+                'p95': round(latencies[int(len(latencies) * 0.95) - 1], 1),
+                'max': round(latencies[-1], 1),
+            }
+        }, indent=2))
+    
+    def _simulate_user(self, base_url, token, rounds):
+        """Load the dashboard `rounds` times, firing its requests in parallel like the app."""
+        latencies = []
+        errors = 0
+        with ThreadPoolExecutor(max_workers=len(DASHBOARD_PATHS)) as fan_out:
+            for _ in range(rounds):
+                for latency in fan_out.map(lambda path: _get(base_url + path, token), DASHBOARD_PATHS):
+                    if latency is None:
+                        errors += 1
+                    else:
+                        latencies.append(latency)
+        return latencies, errors
+
+
+def _get(url, token):
+    """Latency of one GET in milliseconds, or None on failure."""
+    request = urllib.request.Request(url, headers={'Authorization': f'Bearer {token}'})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+    except (urllib.error.URLError, OSError):
+        return None
+    return (time.perf_counter() - started) * 1000
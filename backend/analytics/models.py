@@ -28,6 +28,10 @@ class UserAnalytics(models.Model):
     # Health correlations
     sleep_correlation = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
     stress_correlation = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
+    correlations = models.JSONField(
+        default=dict,
+        help_text="Per-factor point-biserial r, 95% CI and day count at lags 0-2"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -35,6 +39,36 @@ class UserAnalytics(models.Model):
     class Meta:
         db_table = 'user_analytics'
         ordering = ['-period_end']
+        unique_together = ['user', 'period_start', 'period_end']
+        indexes = [
+            models.Index(fields=['user', '-period_end'], name='analytics_user_end_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.period_start} to {self.period_end}"
+
+
+class AnalyticsSnapshot(models.Model):
+    """Precomputed analytics payload served by AnalyticsViewSet (see summaries.py)."""
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='analytics_snapshots')
+    kind = models.CharField(
+        max_length=20,
+        choices=[
+            ('summary', 'Summary'),
+            ('correlations', 'Correlations')
+        ]
+    )
+    
+    payload = models.JSONField(default=dict)
+    period_end = models.DateField(help_text="Day the payload was computed for")
+    stale = models.BooleanField(default=False, help_text="New data arrived since computation")
+    
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'analytics_snapshots'
+        unique_together = ['user', 'kind']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.kind} ({self.period_end})"
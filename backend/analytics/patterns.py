@@ -0,0 +1,113 @@
+"""
+Weekday and time-of-day migraine histograms computed in the database.
+
+Events are bucketed by a single grouped query on (weekday, hour) in the user's
+own timezone, so at most 7 x 24 rows are returned regardless of how many
+events fall in the window.
+"""
+
+from collections import Counter
+from datetime import datetime, time, timedelta
+from django.db.models import Count
+from django.db.models.functions import ExtractHour, ExtractWeekDay
+
+from migraine.models import MigraineEvent
+from predictions.scheduling import get_zone
+
+# ExtractWeekDay numbers days from 1 (Sunday) to 7 (Saturday)
+WEEKDAY_NAMES = {
+    1: 'Sunday',
+    2: 'Monday',
+    3: 'Tuesday',
+    4: 'Wednesday',
+    5: 'Thursday',
+    6: 'Friday',
+    7: 'Saturday',
+}
+DAY_ORDER = [2, 3, 4, 5, 6, 7, 1]
+
+
+def time_period(hour):
+    """Map a local hour to the morning/afternoon/evening/night bucket."""
+    if 6 <= hour < 12:
+        return 'morning'
+    elif 12 <= hour < 17:
+        return 'afternoon'
+    elif 17 <= hour < 22:
+        return 'evening'
+    return 'night'
+
+
+def weekly_patterns(user, days=30):
+    """Day-of-week and time-of-day counts for the last `days` local days."""
+    return _patterns_payload(user, days, list(_pattern_rows(user, days)))
+
+
+async def aweekly_patterns(user, days=30):
+    """Async weekly_patterns."""
+    return _patterns_payload(user, days, [row async for row in _pattern_rows(user, days)])
+
+
+def weekly_patterns_from_events(user, days, start_times):
+    """weekly_patterns over already fetched event start times covering the window."""
+    zone, window_start, window_end = _window(user, days)
+    
+    counts = Counter()
+    for start_time in start_times:
+        if window_start <= start_time < window_end:
+            local = start_time.astimezone(zone)
+            # isoweekday() runs 1 (Monday) to 7 (Sunday); match ExtractWeekDay
+            counts[local.isoweekday() % 7 + 1, local.hour] += 1
+    
+    rows = [{'weekday': weekday, 'hour': hour, 'count': count} for (weekday, hour), count in counts.items()]
+    return _patterns_payload(user, days, rows)
+
+
+def pattern_window_start(user, days):
+    """Earliest start_time counted by weekly_patterns."""
+    return _window(user, days)[1]
+
+
+def _window(user, days):
+    # Local-midnight bounds keep the filter a plain range on start_time
+    zone = get_zone(user.timezone)
+    end_date = datetime.now(zone).date()
+    start_date = end_date - timedelta(days=days)
+    return (
+        zone,
+        datetime.combine(start_date, time.min, tzinfo=zone),
+        datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=zone)
+    )
+
+
+def _pattern_rows(user, days):
+    zone, window_start, window_end = _window(user, days)
+    return MigraineEvent.objects.filter(
+        user=user,
+        start_time__gte=window_start,
+        start_time__lt=window_end
+    ).order_by().values(
+        weekday=ExtractWeekDay('start_time', tzinfo=zone),
+        hour=ExtractHour('start_time', tzinfo=zone)
+    ).annotate(count=Count('id'))
+
+
+def _patterns_payload(user, days, rows):
+    weekday_counts = {}
+    time_periods = {'morning': 0, 'afternoon': 0, 'evening': 0, 'night': 0}
+    total = 0
+    for row in rows:
+        weekday_counts[row['weekday']] = weekday_counts.get(row['weekday'], 0) + row['count']
+        time_periods[time_period(row['hour'])] += row['count']
+        total += row['count']
+    
+    return {
+        'day_of_week': {
+            WEEKDAY_NAMES[day]: weekday_counts[day]
+            for day in DAY_ORDER if day in weekday_counts
+        },
+        'time_of_day': time_periods,
+        'total_migraines': total,
+        'days': days,
+        'timezone': user.timezone
+    }
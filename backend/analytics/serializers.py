@@ -12,7 +12,7 @@ class UserAnalyticsSerializer(serializers.ModelSerializer):
             'total_migraines', 'avg_severity', 'avg_duration_hours',
             'top_triggers', 'best_day_of_week', 'worst_day_of_week',
             'best_time_of_day', 'worst_time_of_day',
-            'sleep_correlation', 'stress_correlation',
+            'sleep_correlation', 'stress_correlation', 'correlations',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
@@ -0,0 +1,36 @@
+"""
+Signal handlers keeping materialized analytics snapshots fresh.
+"""
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from logs.models import DailyLog
+from migraine.models import MigraineEvent
+from migraine_backend import debounce, versions
+from .models import UserAnalytics
+from . import summaries
+
+
+@receiver(post_save, sender=DailyLog)
+@receiver(post_delete, sender=DailyLog)
+@receiver(post_save, sender=MigraineEvent)
+@receiver(post_delete, sender=MigraineEvent)
+def refresh_analytics_snapshots(sender, instance, raw=False, **kwargs):
+    """Mark the user's snapshots stale and recompute them shortly after commit."""
+    if raw:
+        return
+    
+    from .tasks import refresh_user_snapshots
+    
+    # Reads recompute stale snapshots live, so the refresh can wait for a sync to finish
+    summaries.mark_stale(instance.user_id)
+    debounce.schedule(refresh_user_snapshots, instance.user_id, settings.ANALYTICS_REFRESH_DELAY)
+
+
+@receiver(post_save, sender=UserAnalytics)
+@receiver(post_delete, sender=UserAnalytics)
+def bump_analytics_version(sender, instance, **kwargs):
+    """Invalidate conditional GET validators of the analytics list."""
+    versions.bump(instance.user_id, UserAnalytics)
@@ -0,0 +1,276 @@
+"""
+Materialized analytics snapshots.
+
+The summary and correlations payloads are stored per user in AnalyticsSnapshot
+and served with a single indexed lookup. A snapshot is recomputed live when it
+is missing, was computed for an earlier day, is older than
+ANALYTICS_SNAPSHOT_MAX_AGE seconds, or was marked stale by a new log or event
+(see signals.py, which also queues a background refresh).
+"""
+
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+from migraine_backend.concurrency import gather_queries
+
+from .models import AnalyticsSnapshot
+from . import correlation
+from migraine.models import MigraineEvent
+from logs.models import DailyLog
+from predictions import feature_store
+from predictions.features import WindowFeatures
+
+
+def get_snapshot(user, kind):
+    """Return the payload for kind, recomputing it when the snapshot is unusable."""
+    today = datetime.now().date()
+    snapshot = AnalyticsSnapshot.objects.filter(user=user, kind=kind).first()
+    
+    if snapshot and _is_fresh(snapshot, today):
+        return snapshot.payload
+    
+    return refresh_snapshot(user, kind, today)
+
+
+async def aget_snapshot(user, kind):
+    """Async get_snapshot."""
+    today = datetime.now().date()
+    snapshot = await AnalyticsSnapshot.objects.filter(user=user, kind=kind).afirst()
+    
+    if snapshot and _is_fresh(snapshot, today):
+        return snapshot.payload
+    
+    return await arefresh_snapshot(user, kind, today)
+
+
+def refresh_snapshot(user, kind, end_date=None):
+    """Compute kind live and store it as the user's snapshot."""
+    end_date = end_date or datetime.now().date()
+    payload = SNAPSHOT_BUILDERS[kind](user, end_date)
+    
+    AnalyticsSnapshot.objects.update_or_create(
+        user=user,
+        kind=kind,
+        defaults={
+            'payload': payload,
+            'period_end': end_date,
+            'stale': False
+        }
+    )
+    return payload
+
+
+async def arefresh_snapshot(user, kind, end_date=None):
+    """Async refresh_snapshot; independent queries of the builder run concurrently."""
+    end_date = end_date or datetime.now().date()
+    payload = await ASYNC_SNAPSHOT_BUILDERS[kind](user, end_date)
+    
+    await AnalyticsSnapshot.objects.aupdate_or_create(
+        user=user,
+        kind=kind,
+        defaults={
+            'payload': payload,
+            'period_end': end_date,
+            'stale': False
+        }
+    )
+    return payload
+
+
+def mark_stale(user_id):
+    """Flag every snapshot of a user as needing recomputation."""
+    AnalyticsSnapshot.objects.filter(user_id=user_id, stale=False).update(stale=True)
+
+
+def compute_summary(user, end_date):
+    """Overall health summary for the 30 days up to end_date."""
+    start_date = end_date - timedelta(days=30)
+    return _summary_payload(
+        start_date, end_date, _migraine_stats(user, start_date), _log_stats(user, start_date)
+    )
+
+
+async def acompute_summary(user, end_date):
+    """Async compute_summary; migraine and log stats are queried concurrently."""
+    start_date = end_date - timedelta(days=30)
+    migraine_stats, log_stats = await gather_queries(
+        lambda: _migraine_stats(user, start_date),
+        lambda: _log_stats(user, start_date)
+    )
+    return _summary_payload(start_date, end_date, migraine_stats, log_stats)
+
+
+def summary_from_window(end_date, events, day_sums):
+    """
+    compute_summary over already fetched data: (start_time, severity) pairs and
+    per-day sums (see predictions.features.load_day_sums), both covering the
+    30 days up to end_date.
+    """
+    start_date = end_date - timedelta(days=30)
+    window_start = datetime.combine(start_date, time.min, tzinfo=timezone.get_current_timezone())
+    
+    severities = [severity for start_time, severity in events if start_time >= window_start]
+    migraine_stats = {
+        'total': len(severities),
+        'avg_severity': sum(severities) / len(severities) if severities else None
+    }
+    
+    totals = {}
+    for day, sums in day_sums.items():
+        if day >= start_date:
+            for name, value in sums.items():
+                if value is not None:
+                    totals[name] = totals.get(name, 0) + value
+    features = WindowFeatures.from_sums(totals)
+    log_stats = {
+        'avg_sleep': features.avg_sleep,
+        'avg_stress': features.avg_stress,
+        'avg_water': features.avg_water,
+        'log_count': features.log_count
+    }
+    
+    return _summary_payload(start_date, end_date, migraine_stats, log_stats)
+
+
+def summary_window_start(end_date):
+    """Earliest day covered by the summary ending at end_date."""
+    return end_date - timedelta(days=30)
+
+
+def _migraine_stats(user, start_date):
+    return MigraineEvent.objects.filter(user=user).started_between(start_date).aggregate(
+        total=Count('id'),
+        avg_severity=Avg('severity')
+    )
+
+
+def _log_stats(user, start_date):
+    # Daily log stats, from two feature store rows when available
+    totals = None
+    if settings.FEATURE_STORE_ENABLED:
+        totals = feature_store.window_sums(user.id, start_date)
+    
+    if totals is not None:
+        features = WindowFeatures.from_sums(totals)
+        return {
+            'avg_sleep': features.avg_sleep,
+            'avg_stress': features.avg_stress,
+            'avg_water': features.avg_water,
+            'log_count': features.log_count
+        }
+    
+    return DailyLog.objects.filter(
+        user=user,
+        date__gte=start_date
+    ).aggregate(
+        avg_sleep=Avg('sleep_hours'),
+        avg_stress=Avg('stress_level'),
+        avg_water=Avg('water_intake'),
+        log_count=Count('id')
+    )
+
+
+def _summary_payload(start_date, end_date, migraine_stats, log_stats):
+    return {
+        'period': {
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat()
+        },
+        'migraines': {
+            'total': migraine_stats['total'],
+            'avg_severity': _number(migraine_stats['avg_severity']),
+        },
+        'daily_logs': {
+            'avg_sleep': _number(log_stats['avg_sleep']),
+            'avg_stress': _number(log_stats['avg_stress']),
+            'avg_water': _number(log_stats['avg_water']),
+            'log_count': log_stats['log_count']
+        }
+    }
+
+
+def compute_correlations(user, end_date):
+    """
+    Log averages on migraine vs non-migraine days over the 60 days up to
+    end_date, with point-biserial coefficients (see correlation.py).
+    """
+    start_date = end_date - timedelta(days=60)
+    return _correlations_payload(
+        _day_averages(user, start_date),
+        correlation.correlate_users([user.id], end_date, days=61)[user.id]
+    )
+
+
+async def acompute_correlations(user, end_date):
+    """Async compute_correlations; averages and coefficients are queried concurrently."""
+    start_date = end_date - timedelta(days=60)
+    averages, coefficients = await gather_queries(
+        lambda: _day_averages(user, start_date),
+        lambda: correlation.correlate_users([user.id], end_date, days=61)[user.id]
+    )
+    return _correlations_payload(averages, coefficients)
+
+
+def _day_averages(user, start_date):
+    # Get days with migraines
+    migraine_dates = set(
+        MigraineEvent.objects.filter(user=user).started_between(start_date).values_list(
+            'start_time__date', flat=True
+        )
+    )
+    
+    # Averages for migraine vs non-migraine days in one aggregate
+    on_migraine_day = Q(date__in=migraine_dates)
+    return DailyLog.objects.filter(
+        user=user,
+        date__gte=start_date
+    ).aggregate(
+        migraine_sleep=Avg('sleep_hours', filter=on_migraine_day),
+        migraine_stress=Avg('stress_level', filter=on_migraine_day),
+        migraine_water=Avg('water_intake', filter=on_migraine_day),
+        other_sleep=Avg('sleep_hours', filter=~on_migraine_day),
+        other_stress=Avg('stress_level', filter=~on_migraine_day),
+        other_water=Avg('water_intake', filter=~on_migraine_day),
+    )
+
+
+def _correlations_payload(averages, coefficients):
+    return {
+        'migraine_days': {
+            'avg_sleep': _number(averages['migraine_sleep']),
+            'avg_stress': _number(averages['migraine_stress']),
+            'avg_water': _number(averages['migraine_water']),
+        },
+        'non_migraine_days': {
+            'avg_sleep': _number(averages['other_sleep']),
+            'avg_stress': _number(averages['other_stress']),
+            'avg_water': _number(averages['other_water']),
+        },
+        'coefficients': coefficients
+    }
+
+
+SNAPSHOT_BUILDERS = {
+    'summary': compute_summary,
+    'correlations': compute_correlations,
+}
+
+ASYNC_SNAPSHOT_BUILDERS = {
+    'summary': acompute_summary,
+    'correlations': acompute_correlations,
+}
+
+
+def _is_fresh(snapshot, today):
+    age = (timezone.now() - snapshot.computed_at).total_seconds()
+    return (
+        not snapshot.stale
+        and snapshot.period_end == today
+        and age <= settings.ANALYTICS_SNAPSHOT_MAX_AGE
+    )
+
+
+def _number(value):
+    # Averages may be Decimal or None; store plain JSON numbers
+    return float(value) if value else 0
@@ -1,100 +1,143 @@
 from celery import shared_task
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from datetime import datetime, timedelta
 from collections import Counter
-from django.db.models import Avg
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F
+from django.db.models.functions import ExtractWeekDay
+from migraine_backend import debounce, versions
 
 from .models import UserAnalytics
+from . import correlation, summaries, triggers
+from .patterns import WEEKDAY_NAMES
 from migraine.models import MigraineEvent
-from logs.models import DailyLog
 
 User = get_user_model()
 
 
-@shared_task
-def aggregate_user_analytics():
-    """Aggregate analytics for all users (weekly)."""
-    users = User.objects.filter(is_active=True)
-    analytics_created = 0
-    
-    for user in users:
-        result = _calculate_user_analytics(user)
-        if result:
-            analytics_created += 1
-    
-    return f"Created analytics for {analytics_created} users"
+# Fields rewritten when a user's row for the period already exists
+ANALYTICS_UPDATE_FIELDS = [
+    'total_migraines', 'avg_severity', 'avg_duration_hours', 'top_triggers',
+    'worst_day_of_week', 'sleep_correlation', 'stress_correlation',
+    'correlations', 'updated_at'
+]
 
 
-def _calculate_user_analytics(user):
-    """Calculate analytics for a specific user."""
+@shared_task
+def aggregate_user_analytics(chunk_size=None):
+    """Aggregate analytics for all users (weekly), one user ID range at a time."""
+    chunk_size = chunk_size or settings.ANALYTICS_CHUNK_SIZE
+    
     # Calculate for last 7 days
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=7)
     
-    # Get migraines in period
-    migraines = MigraineEvent.objects.filter(
-        user=user,
-        start_time__date__gte=start_date,
-        start_time__date__lte=end_date
-    )
+    analytics_created = 0
+    for first_id, last_id in _user_id_ranges(chunk_size):
+        analytics_created += _aggregate_chunk(first_id, last_id, start_date, end_date)
     
-    if not migraines.exists():
-        return None
+    return f"Created analytics for {analytics_created} users"
+
+
+def _user_id_ranges(chunk_size):
+    """Yield (first_id, last_id) ranges covering chunk_size active users each."""
+    user_ids = User.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)
+    chunk = []
+    for user_id in user_ids.iterator(chunk_size=chunk_size):
+        chunk.append(user_id)
+        if len(chunk) == chunk_size:
+            yield chunk[0], chunk[-1]
+            chunk = []
+    if chunk:
+        yield chunk[0], chunk[-1]
+
+
+def _aggregate_chunk(first_id, last_id, start_date, end_date):
+    """Compute and upsert UserAnalytics for active users with IDs in [first_id, last_id]."""
+    migraines = MigraineEvent.objects.filter(
+        user_id__gte=first_id,
+        user_id__lte=last_id,
+        user__is_active=True
+    ).started_between(start_date, end_date)
     
-    # Calculate statistics
-    total_migraines = migraines.count()
-    avg_severity = migraines.aggregate(Avg('severity'))['severity__avg']
+    # Counts, severity and duration per user; users without migraines get no row
+    stats = {
+        row['user_id']: row
+        for row in migraines.order_by().values('user_id').annotate(
+            total=Count('id'),
+            avg_severity=Avg('severity'),
+            avg_duration=Avg(
+                ExpressionWrapper(F('end_time') - F('start_time'), output_field=DurationField())
+            )
+        )
+    }
+    if not stats:
+        return 0
     
-    # Calculate average duration
-    durations = [m.duration_hours for m in migraines if m.duration_hours]
-    avg_duration = sum(durations) / len(durations) if durations else None
+    # Day of week patterns
+    day_counts = {}
+    for row in migraines.order_by().values(
+        'user_id', weekday=ExtractWeekDay('start_time')
+    ).annotate(count=Count('id')):
+        day_counts.setdefault(row['user_id'], Counter())[WEEKDAY_NAMES[row['weekday']]] = row['count']
     
     # Top triggers
-    all_triggers = []
-    for migraine in migraines:
-        all_triggers.extend(migraine.triggers)
-    trigger_counts = Counter(all_triggers)
-    top_triggers = [
-        {'trigger': t, 'count': c}
-        for t, c in trigger_counts.most_common(5)
-    ]
+    top_triggers = triggers.top_triggers_by_user(migraines, limit=5)
     
-    # Day of week patterns
-    day_counts = Counter(m.start_time.strftime('%A') for m in migraines)
-    worst_day = day_counts.most_common(1)[0][0] if day_counts else ''
-    
-    # Get correlations from daily logs
-    logs = DailyLog.objects.filter(
-        user=user,
-        date__gte=start_date,
-        date__lte=end_date
+    # Point-biserial correlations of daily factors with migraine onset
+    reports = correlation.correlate_users(
+        sorted(stats), end_date, settings.ANALYTICS_CORRELATION_DAYS
     )
     
-    sleep_corr = None
-    stress_corr = None
-    if logs.exists():
-        # Simplified correlation (would use scipy in production)
-        migraine_dates = set(m.start_time.date() for m in migraines)
-        migraine_logs = logs.filter(date__in=migraine_dates)
-        
-        if migraine_logs.exists():
-            sleep_corr = migraine_logs.aggregate(Avg('sleep_hours'))['sleep_hours__avg']
-            stress_corr = migraine_logs.aggregate(Avg('stress_level'))['stress_level__avg']
+    rows = []
+    for user_id, row in stats.items():
+        report = reports[user_id]
+        worst_day = day_counts[user_id].most_common(1)[0][0] if user_id in day_counts else ''
+        rows.append(UserAnalytics(
+            user_id=user_id,
+            period_start=start_date,
+            period_end=end_date,
+            total_migraines=row['total'],
+            avg_severity=row['avg_severity'],
+            avg_duration_hours=_hours(row['avg_duration']),
+            top_triggers=top_triggers.get(user_id, []),
+            worst_day_of_week=worst_day,
+            sleep_correlation=_rounded(report['sleep_hours']['lag_0']['r']),
+            stress_correlation=_rounded(report['stress_level']['lag_0']['r']),
+            correlations=report,
+        ))
     
-    # Create or update analytics
-    analytics, created = UserAnalytics.objects.update_or_create(
-        user=user,
-        period_start=start_date,
-        period_end=end_date,
-        defaults={
-            'total_migraines': total_migraines,
-            'avg_severity': avg_severity,
-            'avg_duration_hours': avg_duration,
-            'top_triggers': top_triggers,
-            'worst_day_of_week': worst_day,
-            'sleep_correlation': sleep_corr,
-            'stress_correlation': stress_corr,
-        }
+    UserAnalytics.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['user', 'period_start', 'period_end'],
+        update_fields=ANALYTICS_UPDATE_FIELDS
     )
+    versions.bump_many(stats, UserAnalytics)
+    return len(rows)
+
+
+def _hours(duration):
+    return round(duration.total_seconds() / 3600, 2) if duration is not None else None
+
+
+def _rounded(value):
+    # Correlation fields hold two decimal places
+    return round(value, 2) if value is not None else None
+
+
+@shared_task
+def refresh_user_snapshots(user_id):
+    """Recompute a user's materialized analytics snapshots."""
+    # Writes from here on need a run of their own
+    debounce.release(refresh_user_snapshots, user_id)
+    
+    try:
+        user = User.objects.get(id=user_id)
+    except User.DoesNotExist:
+        return f"User {user_id} not found"
+    
+    for kind in summaries.SNAPSHOT_BUILDERS:
+        summaries.refresh_snapshot(user, kind)
     
-    return analytics
+    return f"Refreshed analytics snapshots for {user.username}"
@@ -0,0 +1,85 @@
+"""
+Trigger frequency counting done in the database.
+
+MigraineEvent.triggers is a JSON list, so the events are unnested with
+jsonb_array_elements_text on PostgreSQL or json_each on SQLite and grouped by
+trigger. Only (trigger, count) rows leave the database; events are never
+loaded as model instances.
+"""
+
+from collections import Counter
+from django.db import connection
+
+from migraine.models import MigraineEvent
+
+# Unnest one JSON trigger list per event row; the CASE/WHERE guards skip
+# events whose triggers value is not an array.
+UNNEST_SQL = {
+    'postgresql': (
+        "SELECT {group}, COUNT(*) AS n FROM ({events}) e "
+        "CROSS JOIN LATERAL jsonb_array_elements_text("
+        "CASE WHEN jsonb_typeof(e.triggers) = 'array' THEN e.triggers ELSE '[]'::jsonb END"
+        ") AS t(value) "
+        "GROUP BY {group} ORDER BY {group_order} n DESC, t.value"
+    ),
+    'sqlite': (
+        "SELECT {group}, COUNT(*) AS n FROM ({events}) e, json_each(e.triggers) t "
+        "WHERE json_type(e.triggers) = 'array' "
+        "GROUP BY {group} ORDER BY {group_order} n DESC, t.value"
+    ),
+}
+
+
+def top_triggers(user, limit=10, start_date=None, end_date=None):
+    """Most frequent triggers for a user as [{'trigger': ..., 'count': ...}]."""
+    events = MigraineEvent.objects.filter(user=user).started_between(start_date, end_date)
+    events = events.order_by().values('triggers')
+    
+    template = UNNEST_SQL.get(connection.vendor)
+    if template is None:
+        # Other backends: count in Python, but over the JSON column only
+        counts = Counter()
+        for triggers in events.values_list('triggers', flat=True):
+            counts.update(triggers or [])
+        rows = counts.most_common(limit)
+    else:
+        sql = template.format(events='{events}', group='t.value', group_order='') + ' LIMIT %s'
+        rows = _execute(sql, events, [limit])
+    
+    return [{'trigger': trigger, 'count': count} for trigger, count in rows]
+
+
+def top_triggers_by_user(events, limit=5):
+    """
+    Most frequent triggers of every user in an event queryset, as
+    {user_id: [{'trigger': ..., 'count': ...}]}, in one grouped query.
+    """
+    events = events.order_by().values('user_id', 'triggers')
+    
+    template = UNNEST_SQL.get(connection.vendor)
+    if template is None:
+        counts = {}
+        for user_id, triggers in events.values_list('user_id', 'triggers'):
+            counts.setdefault(user_id, Counter()).update(triggers or [])
+        rows = [
+            (user_id, trigger, count)
+            for user_id, counter in counts.items()
+            for trigger, count in counter.most_common(limit)
+        ]
+    else:
+        sql = template.format(events='{events}', group='e.user_id, t.value', group_order='e.user_id,')
+        rows = _execute(sql, events)
+    
+    top = {}
+    for user_id, trigger, count in rows:
+        user_top = top.setdefault(user_id, [])
+        if len(user_top) < limit:
+            user_top.append({'trigger': trigger, 'count': count})
+    return top
+
+
+def _execute(sql, events, extra_params=()):
+    events_sql, params = events.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(events=events_sql), [*params, *extra_params])
+        return cursor.fetchall()
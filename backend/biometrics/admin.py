@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Biometrics
+from .models import Biometrics, BiometricsRollup
 
 
 @admin.register(Biometrics)
@@ -8,3 +8,11 @@ class BiometricsAdmin(admin.ModelAdmin):
     list_filter = ['timestamp', 'data_source']
     search_fields = ['user__username']
     date_hierarchy = 'timestamp'
+
+
+@admin.register(BiometricsRollup)
+class BiometricsRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'metric', 'resolution', 'bucket_start', 'min_value', 'max_value', 'count']
+    list_filter = ['resolution', 'metric']
+    search_fields = ['user__username']
+    date_hierarchy = 'bucket_start'
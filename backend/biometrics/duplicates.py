@@ -0,0 +1,52 @@
+"""
+Duplicate wearable samples left over from before the unique key.
+
+Biometrics is unique on (user, timestamp, data_source), but databases created
+before that constraint may hold repeated samples, and adding the constraint
+to them fails with IntegrityError. Until the key exists, the pre_migrate
+handler in signals.py deletes every repeat except the lowest id, so migrate can
+apply it. Plain SQL is used because the model may be ahead of the schema at
+that point.
+"""
+
+import logging
+
+from .models import Biometrics
+
+logger = logging.getLogger(__name__)
+
+TABLE = Biometrics._meta.db_table
+KEY_COLUMNS = ['user_id', 'timestamp', 'data_source']
+
+
+def has_unique_key(connection):
+    """False only when the table exists without the unique key."""
+    with connection.cursor() as cursor:
+        if TABLE not in connection.introspection.table_names(cursor):
+            return True
+        constraints = connection.introspection.get_constraints(cursor, TABLE)
+    return any(
+        constraint['unique'] and sorted(constraint['columns']) == sorted(KEY_COLUMNS)
+        for constraint in constraints.values()
+    )
+
+
+def delete_duplicates(connection):
+    """Delete all but the lowest id of each repeated sample; returns rows deleted."""
+    key = ', '.join(connection.ops.quote_name(column) for column in KEY_COLUMNS)
+    table = connection.ops.quote_name(TABLE)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE id IN ("
+            f"SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY {key} ORDER BY id) AS position "
+            f"FROM {table}) ranked WHERE position > 1)"
+        )
+        deleted = cursor.rowcount
+    
+    if deleted:
+        logger.warning(
+            "Deleted %s duplicate biometrics samples before adding the unique key; "
+            "run backfill_biometrics_rollups and backfill_feature_store to rebuild derived data",
+            deleted
+        )
+    return deleted
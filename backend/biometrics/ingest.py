@@ -0,0 +1,210 @@
+"""
+Bulk ingestion of wearable samples.
+
+Samples are checked with plain field rules instead of one ModelSerializer per
+row, deduplicated on (user, timestamp, data_source) against the payload and
+the database, and inserted in batches that skip samples written concurrently.
+Bulk inserts bypass model signals, so the feature store refresh and prediction
+cache invalidation normally done by predictions.signals are triggered here
+once per request.
+Samples older than the raw retention window (history imports) are rolled
+straight into the daily tier, unless their day is already rolled up with its
+raw samples deleted; those count as duplicates.
+"""
+
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from migraine_backend import versions
+
+from .models import Biometrics
+from . import rollups
+from predictions import cache as prediction_cache
+from predictions import recompute as prediction_recompute
+from predictions.tasks import refresh_user_features
+
+INTEGER_FIELDS = [
+    'heart_rate', 'resting_heart_rate', 'systolic_bp', 'diastolic_bp',
+    'steps', 'calories_burned'
+]
+
+# field: (max_digits, decimal_places), mirroring the model
+DECIMAL_FIELDS = {
+    'hrv': (5, 2),
+    'weight': (5, 2),
+    'body_temperature': (4, 1),
+}
+
+REQUIRED_FIELDS = ['timestamp', 'heart_rate']
+
+DATA_SOURCES = {choice for choice, _ in Biometrics._meta.get_field('data_source').choices}
+
+MAX_INTEGER = 2 ** 31 - 1
+
+# Rejected rows reported back in detail; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+def validate_sample(item):
+    """Return (field values, None) for a valid sample or (None, errors)."""
+    if not isinstance(item, dict):
+        return None, {'non_field_errors': 'Expected a JSON object.'}
+    
+    errors = {}
+    values = {}
+    
+    for field in REQUIRED_FIELDS:
+        if item.get(field) is None:
+            errors[field] = 'This field is required.'
+    
+    timestamp = item.get('timestamp')
+    if timestamp is not None:
+        try:
+            parsed = parse_datetime(timestamp) if isinstance(timestamp, str) else None
+        except ValueError:
+            # Well formed but not a real date or time, e.g. February 30th
+            parsed = None
+        if parsed is None:
+            errors['timestamp'] = 'Datetime has wrong format. Use ISO 8601.'
+        else:
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            values['timestamp'] = parsed
+    
+    for field in INTEGER_FIELDS:
+        value = item.get(field)
+        if value is None:
+            continue
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if isinstance(value, bool) or not isinstance(value, int) or abs(value) > MAX_INTEGER:
+            errors[field] = 'A valid integer is required.'
+        else:
+            values[field] = value
+    
+    for field, (max_digits, places) in DECIMAL_FIELDS.items():
+        value = item.get(field)
+        if value is None:
+            continue
+        try:
+            number = Decimal(str(value)).quantize(Decimal(1).scaleb(-places))
+        except (InvalidOperation, ValueError):
+            errors[field] = 'A valid number is required.'
+            continue
+        if isinstance(value, bool) or not number.is_finite() or abs(number) >= 10 ** (max_digits - places):
+            errors[field] = f'Ensure that there are no more than {max_digits} digits in total.'
+        else:
+            values[field] = number
+    
+    data_source = item.get('data_source', 'manual')
+    if not isinstance(data_source, str) or data_source not in DATA_SOURCES:
+        errors['data_source'] = f'"{data_source}" is not a valid choice.'
+    else:
+        values['data_source'] = data_source
+    
+    if errors:
+        return None, errors
+    return values, None
+
+
+def ingest(user, items, batch_size=None):
+    """Validate, deduplicate and insert samples for user; return per-row counts."""
+    batch_size = batch_size or settings.BIOMETRICS_INGEST_BATCH_SIZE
+    result = {'received': len(items), 'created': 0, 'duplicates': 0, 'rejected': 0, 'errors': []}
+    
+    samples = {}
+    for index, item in enumerate(items):
+        values, errors = validate_sample(item)
+        if errors:
+            result['rejected'] += 1
+            if len(result['errors']) < MAX_REPORTED_ERRORS:
+                result['errors'].append({'index': index, 'errors': errors})
+            continue
+        
+        key = (values['timestamp'], values['data_source'])
+        if key in samples:
+            result['duplicates'] += 1
+        else:
+            samples[key] = values
+    
+    # History before the raw retention cutoff is accepted and rolled up below,
+    # except for days already rolled up whose raw samples are gone
+    closed = rollups.closed_days(user.id, {_local_date(timestamp) for timestamp, _ in samples})
+    if closed:
+        for key in [key for key in samples if _local_date(key[0]) in closed]:
+            del samples[key]
+            result['duplicates'] += 1
+    
+    keys = sorted(samples)
+    days = set()
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        existing = set(
+            Biometrics.objects.filter(
+                user=user,
+                timestamp__gte=batch[0][0],
+                timestamp__lte=batch[-1][0],
+                data_source__in={source for _, source in batch}
+            ).values_list('timestamp', 'data_source')
+        )
+        new_rows = [
+            Biometrics(user=user, **samples[key])
+            for key in batch if key not in existing
+        ]
+        
+        with transaction.atomic():
+            inserted = _insert_new(new_rows) if new_rows else []
+        
+        result['created'] += len(inserted)
+        result['duplicates'] += len(batch) - len(inserted)
+        days.update(_local_date(timestamp) for timestamp in inserted)
+    
+    cutoff = rollups.retention_cutoff()
+    expired = [day for day in days if cutoff and day < cutoff]
+    if expired:
+        # The rollup sweep skips expired days, and reads take them from the daily tier
+        rollups.rollup_days(user.id, expired, include_expired=True)
+    
+    if days:
+        _after_ingest(user.id, days)
+    
+    return result
+
+
+def _insert_new(rows):
+    """
+    Insert rows, skipping samples inserted concurrently since the duplicate
+    check, and return the timestamps actually written. bulk_create with
+    ignore_conflicts can't tell which rows were skipped, so this issues the same
+    INSERT ... ON CONFLICT DO NOTHING with RETURNING id.
+    """
+    fields = [field for field in Biometrics._meta.concrete_fields if not field.primary_key]
+    batch_size = connection.ops.bulk_batch_size(fields, rows)
+    
+    ids = []
+    for start in range(0, len(rows), batch_size):
+        returned = Biometrics.objects._insert(
+            rows[start:start + batch_size], fields=fields,
+            returning_fields=[Biometrics._meta.pk], on_conflict=OnConflict.IGNORE
+        )
+        # A skipped single-row insert comes back as None
+        ids.extend(row[0] for row in returned if row)
+    
+    return list(Biometrics.objects.filter(pk__in=ids).values_list('timestamp', flat=True))
+
+
+def _after_ingest(user_id, days):
+    """Stand in for the per-row signals that bulk_create skips."""
+    prediction_cache.invalidate_user(user_id)
+    prediction_recompute.schedule(user_id)
+    versions.bump(user_id, Biometrics)
+    if settings.FEATURE_STORE_ENABLED:
+        day_list = sorted(day.isoformat() for day in days)
+        transaction.on_commit(lambda: refresh_user_features.delay(user_id, day_list))
+
+
+def _local_date(timestamp):
+    return timezone.localtime(timestamp).date()
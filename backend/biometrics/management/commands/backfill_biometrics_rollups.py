@@ -0,0 +1,16 @@
+import time
+from django.core.management.base import BaseCommand
+
+from biometrics import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the hourly and daily Biometrics rollups from raw samples."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help="Only rebuild this user ID (repeatable)")
+    
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = rollups.backfill(options['users'])
+        self.stdout.write(f"Wrote {written} rollup rows in {time.monotonic() - started:.1f}s")
@@ -0,0 +1,97 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from biometrics.models import Biometrics
+from biometrics.serializers import BiometricsSerializer, BiometricsListSerializer
+from migraine.models import MigraineEvent
+from migraine.serializers import MigraineEventSerializer, MigraineEventListSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ModelSerializer and values()-based list serialization time for "
+        "biometrics and migraine events, creating a benchmark user with --rows "
+        "rows of each if needed."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Rows serialized per run")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per serializer")
+    
+    def handle(self, *args, **options):
+        user = self._prepare(options['rows'])
+        
+        cases = [
+            ('biometrics', Biometrics, BiometricsSerializer, BiometricsListSerializer),
+            ('migraine events', MigraineEvent, MigraineEventSerializer, MigraineEventListSerializer),
+        ]
+        for name, model, model_serializer, list_serializer in cases:
+            queryset = model.objects.filter(user=user)[:options['rows']]
+            instances = list(queryset)
+            rows = list(list_serializer.values(model.objects.filter(user=user))[:options['rows']])
+            
+            slow = lambda: model_serializer(instances, many=True).data
+            fast = lambda: list_serializer(rows).data
+            if _render(slow()) != _render(fast()):
+                self.stderr.write(self.style.ERROR(f"{name}: outputs differ"))
+            
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name} ({len(instances)} rows)"))
+            for label, run in [
+                ('ModelSerializer', slow),
+                ('values() serializer', fast),
+                ('ModelSerializer incl. query', lambda: model_serializer(list(queryset.all()), many=True).data),
+                ('values() serializer incl. query', lambda: list_serializer(
+                    list(list_serializer.values(model.objects.filter(user=user))[:options['rows']])
+                ).data),
+            ]:
+                self.stdout.write(f"  {label:<32} median {self._time(run, options['repeat']):8.1f} ms")
+    
+    def _time(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+    
+    def _prepare(self, rows):
+        user, _ = User.objects.get_or_create(
+            username='bench_list_user',
+            defaults={'email': 'bench_list_user@example.com', 'password': '!'}
+        )
+        now = timezone.now()
+        
+        existing = Biometrics.objects.filter(user=user).count()
+        Biometrics.objects.bulk_create([
+            Biometrics(
+                user=user, timestamp=now - timedelta(minutes=i), heart_rate=55 + i % 45,
+                hrv=15 + i % 65, weight=70 + i % 10, body_temperature=36.5, steps=i % 200,
+                data_source='fitbit'
+            )
+            for i in range(existing + 1, rows + 1)
+        ], batch_size=5000, ignore_conflicts=True)
+        
+        existing = MigraineEvent.objects.filter(user=user).count()
+        MigraineEvent.objects.bulk_create([
+            MigraineEvent(
+                user=user, start_time=now - timedelta(hours=6 * i),
+                end_time=now - timedelta(hours=6 * i - 1 - i % 5) if i % 3 else None,
+                severity=1 + i % 10, symptoms=['nausea', 'aura'], pain_location='left',
+                triggers=['stress', 'poor_sleep'], medications_taken=[{'name': 'ibuprofen', 'dose': '400mg'}]
+            )
+            for i in range(existing + 1, rows + 1)
+        ], batch_size=5000)
+        
+        return user
+
+
+def _render(data):
+    return json.dumps(data, cls=JSONEncoder)
@@ -0,0 +1,124 @@
+import statistics
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from biometrics.models import Biometrics
+from migraine.models import MigraineEvent
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Print query plans and timings for the per-user time-range queries. "
+        "Run before and after migrating (or partitioning) to compare; --generate "
+        "fills biometrics with synthetic rows first (e.g. --generate 10000000)."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--generate', type=int, default=0, help="Synthetic biometrics rows to insert first")
+        parser.add_argument('--users', type=int, default=100, help="Users the synthetic rows are spread over")
+        parser.add_argument('--user', type=int, help="User ID to query (default: the busiest benchmark user)")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per query")
+    
+    def handle(self, *args, **options):
+        if options['generate']:
+            self._generate(options['generate'], options['users'])
+        
+        user_id = options['user'] or self._busiest_user()
+        if user_id is None:
+            raise CommandError("No biometrics rows; use --generate.")
+        
+        today = timezone.localdate()
+        now = timezone.now()
+        week_ago = now - timedelta(days=7)
+        
+        queries = {
+            'biometrics 7-day window aggregate': Biometrics.objects.filter(
+                user_id=user_id, timestamp__gte=week_ago, timestamp__lt=now
+            ).order_by().values('user_id').annotate(bio_count=Count('id'), avg_hrv=Avg('hrv')),
+            'biometrics 1-day raw series': Biometrics.objects.filter(
+                user_id=user_id, timestamp__gte=now - timedelta(days=1), timestamp__lt=now
+            ).order_by('timestamp').values_list('timestamp', 'heart_rate', 'hrv'),
+            'migraines 30 days, __date lookup': MigraineEvent.objects.filter(
+                user_id=user_id, start_time__date__gte=today - timedelta(days=30)
+            ).order_by().values('user_id').annotate(total=Count('id')),
+            'migraines 30 days, range': MigraineEvent.objects.filter(
+                user_id=user_id
+            ).started_between(today - timedelta(days=30)).order_by().values('user_id').annotate(total=Count('id')),
+        }
+        
+        self.stdout.write(f"{Biometrics.objects.count()} biometrics rows; querying user {user_id}\n")
+        for name, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(self._explain(queryset))
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(f"median {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms\n")
+    
+    def _explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            return queryset.explain(analyze=True, buffers=True)
+        return queryset.explain()
+    
+    def _busiest_user(self):
+        row = Biometrics.objects.order_by().values('user_id').annotate(
+            samples=Count('id')
+        ).order_by('-samples').first()
+        return row['user_id'] if row else None
+    
+    def _generate(self, rows, user_count):
+        existing = User.objects.filter(username__startswith='bench_user_').count()
+        User.objects.bulk_create([
+            User(username=f'bench_user_{i}', email=f'bench_user_{i}@example.com', password='!')
+            for i in range(existing, user_count)
+        ])
+        user_ids = list(
+            User.objects.filter(username__startswith='bench_user_').order_by('id').values_list('id', flat=True)[:user_count]
+        )
+        per_user = rows // len(user_ids)
+        started = time.monotonic()
+        
+        for user_id in user_ids:
+            if connection.vendor == 'postgresql':
+                # One sample per minute going back from now, migraines every ~9 days
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"INSERT INTO {Biometrics._meta.db_table} "
+                        "(user_id, timestamp, heart_rate, hrv, data_source, created_at) "
+                        "SELECT %s, now() - g * interval '1 minute', 55 + (random() * 45)::int, "
+                        "round((15 + random() * 65)::numeric, 2), 'fitbit', now() "
+                        "FROM generate_series(1, %s) g ON CONFLICT DO NOTHING",
+                        [user_id, per_user]
+                    )
+                    cursor.execute(
+                        f"INSERT INTO {MigraineEvent._meta.db_table} "
+                        "(user_id, start_time, severity, symptoms, pain_location, triggers, "
+                        "medications_taken, relief_methods, notes, created_at, updated_at) "
+                        "SELECT %s, now() - g * interval '9 days', 1 + (random() * 9)::int, '[]', 'left', "
+                        "'[]', '[]', '[]', '', now(), now() FROM generate_series(1, %s) g",
+                        [user_id, max(per_user // 12960, 1)]
+                    )
+            else:
+                now = timezone.now()
+                Biometrics.objects.bulk_create([
+                    Biometrics(
+                        user_id=user_id, timestamp=now - timedelta(minutes=i),
+                        heart_rate=55 + i % 45, hrv=15 + i % 65, data_source='fitbit'
+                    )
+                    for i in range(1, per_user + 1)
+                ], batch_size=5000, ignore_conflicts=True)
+        
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Biometrics._meta.db_table}, {MigraineEvent._meta.db_table}")
+        
+        self.stdout.write(f"Generated {per_user * len(user_ids)} rows in {time.monotonic() - started:.1f}s\n")
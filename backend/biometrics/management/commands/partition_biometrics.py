@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from biometrics import partitioning
+
+
+class Command(BaseCommand):
+    help = "Partition the biometrics table by month (PostgreSQL), or create upcoming partitions if already partitioned."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3, help="Monthly partitions to create past the current month")
+    
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Partitioning requires PostgreSQL.")
+        
+        already = partitioning.is_partitioned()
+        created = partitioning.partition_table(options['months_ahead'])
+        action = "Added" if already else "Partitioned biometrics with"
+        self.stdout.write(f"{action} {created} monthly partitions")
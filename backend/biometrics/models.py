@@ -47,10 +47,52 @@ class Biometrics(models.Model):
     )
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'biometrics'
         ordering = ['-timestamp']
+        unique_together = ['user', 'timestamp', 'data_source']
+        indexes = [
+            # Covers the window aggregates (sample count, HRV) on PostgreSQL
+            models.Index(fields=['user', 'timestamp'], include=['hrv'], name='biometrics_user_ts_idx'),
+            # Rollup sweep: samples created since the last run
+            models.Index(fields=['created_at'], name='biometrics_created_idx'),
+            # Incremental sync (?since=)
+            models.Index(fields=['user', 'updated_at'], name='biometrics_user_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.timestamp}"
+
+
+class BiometricsRollup(models.Model):
+    """Per-user hourly/daily min, max, sum and count of one Biometrics metric (see rollups.py)."""
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='biometrics_rollups')
+    resolution = models.CharField(
+        max_length=10,
+        choices=[
+            ('hour', 'Hourly'),
+            ('day', 'Daily')
+        ]
+    )
+    bucket_start = models.DateTimeField()
+    metric = models.CharField(max_length=30)
+    
+    min_value = models.DecimalField(max_digits=14, decimal_places=2)
+    max_value = models.DecimalField(max_digits=14, decimal_places=2)
+    sum_value = models.DecimalField(max_digits=18, decimal_places=2)
+    count = models.IntegerField()
+    
+    class Meta:
+        db_table = 'biometrics_rollups'
+        ordering = ['-bucket_start']
+        unique_together = ['user', 'resolution', 'metric', 'bucket_start']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.metric} {self.resolution} {self.bucket_start}"
+    
+    @property
+    def mean_value(self):
+        return self.sum_value / self.count if self.count else None
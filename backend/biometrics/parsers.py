@@ -0,0 +1,41 @@
+import json
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import BaseParser
+
+
+class TooManySamples(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_code = 'too_many_samples'
+    
+    def __init__(self):
+        super().__init__(f'At most {settings.BIOMETRICS_INGEST_MAX_ROWS} samples per request.')
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON, one sample per line. Lines that are not valid JSON
+    become None so the ingest can reject them individually. Parsing stops as
+    soon as the stream holds more than BIOMETRICS_INGEST_MAX_ROWS samples.
+    """
+    
+    media_type = 'application/x-ndjson'
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        items = []
+        try:
+            for line in stream:
+                line = line.strip()
+                if not line:
+                    continue
+                if len(items) == settings.BIOMETRICS_INGEST_MAX_ROWS:
+                    raise TooManySamples()
+                try:
+                    items.append(json.loads(line.decode(encoding)))
+                except ValueError:
+                    items.append(None)
+        except UnicodeDecodeError as exc:
+            raise ParseError(f'NDJSON parse error - {exc}')
+        return items
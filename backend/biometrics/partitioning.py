@@ -0,0 +1,118 @@
+"""
+Optional monthly range partitioning of the biometrics table (PostgreSQL only).
+
+partition_table() rebuilds `biometrics` as a table partitioned by month on
+timestamp, copies the rows over and recreates the model's indexes and unique
+constraint under their Django names. It runs in one transaction holding an
+exclusive lock, so run it in a maintenance window.
+
+The primary key becomes (id, timestamp), because PostgreSQL requires the
+partition key in every unique constraint. No table references biometrics, and
+the ORM still addresses rows by id. The id identity column becomes a bigint
+with a sequence owned by the table, which (unlike identity before PostgreSQL
+17) every partition shares as its default. Rows outside the monthly partitions land
+in a default partition. ensure_partitions() keeps partitions created ahead of
+time, so that partition stays empty.
+"""
+
+from datetime import date
+from django.db import connection, transaction
+
+from .models import Biometrics
+
+TABLE = Biometrics._meta.db_table
+
+
+def is_partitioned():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def partition_table(months_ahead=3):
+    """Convert biometrics into a monthly partitioned table; returns partitions created."""
+    if is_partitioned():
+        return ensure_partitions(months_ahead)
+    
+    with transaction.atomic():
+        return _convert(f'{TABLE}_partitioned', months_ahead)
+
+
+def _convert(staging, months_ahead):
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE')
+        # id loses its identity here and gets a plain owned sequence below:
+        # identity columns only propagate to partitions from PostgreSQL 17
+        cursor.execute(
+            f'CREATE TABLE {staging} (LIKE {TABLE} INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE ("timestamp")'
+        )
+        cursor.execute(f'SELECT MIN("timestamp") FROM {TABLE}')
+        oldest = cursor.fetchone()[0]
+        
+        created = _create_partitions(cursor, staging, _month(oldest.date() if oldest else date.today()), months_ahead)
+        cursor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {staging} DEFAULT')
+        
+        cursor.execute(f'INSERT INTO {staging} SELECT * FROM {TABLE}')
+        cursor.execute(f'DROP TABLE {TABLE}')
+        cursor.execute(f'ALTER TABLE {staging} RENAME TO {TABLE}')
+        # Named like the dropped identity sequence; the default recurses to the partitions
+        cursor.execute(f'CREATE SEQUENCE {TABLE}_id_seq AS bigint OWNED BY {TABLE}.id')
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+        cursor.execute(
+            f"SELECT setval('{TABLE}_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}"
+        )
+        
+        cursor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id, "timestamp")')
+        cursor.execute(
+            f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_user_id_fk FOREIGN KEY (user_id) '
+            f'REFERENCES {Biometrics._meta.get_field("user").related_model._meta.db_table} (id) '
+            f'DEFERRABLE INITIALLY DEFERRED'
+        )
+    
+    # Recreate the model's unique constraint and indexes under their Django names
+    with connection.schema_editor() as schema_editor:
+        schema_editor.alter_unique_together(Biometrics, [], Biometrics._meta.unique_together)
+        for index in Biometrics._meta.indexes:
+            schema_editor.add_index(Biometrics, index)
+    
+    return created
+
+
+def ensure_partitions(months_ahead=3):
+    """Create any missing monthly partitions up to months_ahead from now."""
+    if connection.vendor != 'postgresql' or not is_partitioned():
+        return 0
+    with connection.cursor() as cursor:
+        return _create_partitions(cursor, TABLE, _month(date.today()), months_ahead)
+
+
+def _create_partitions(cursor, table, first_month, months_ahead):
+    last_month = _add_months(_month(date.today()), months_ahead)
+    created = 0
+    month = first_month
+    while month <= last_month:
+        following = _add_months(month, 1)
+        name = f'{TABLE}_{month:%Y_%m}'
+        cursor.execute('SELECT to_regclass(%s)', [name])
+        if cursor.fetchone()[0] is None:
+            cursor.execute(
+                f'CREATE TABLE {name} PARTITION OF {table} '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+            )
+            created += 1
+        month = following
+    return created
+
+
+def _month(day):
+    return day.replace(day=1)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
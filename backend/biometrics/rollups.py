@@ -0,0 +1,331 @@
+"""
+Hourly and daily rollup tiers for Biometrics.
+
+Raw samples are rolled up into BiometricsRollup rows holding min, max, sum and
+count per user, metric and bucket. Hourly buckets are aggregated from raw
+rows with one grouped query and daily buckets are folded from the hourly
+ones. A range is always rebuilt in whole days, so a daily row never mixes
+fresh and stale hours.
+
+Raw samples older than BIOMETRICS_RAW_RETENTION_DAYS are deleted once their
+days are rolled up. Days before that cutoff are only rebuilt from raw rows
+that are still there (history imports, see closed_days()), and feature sums for them are read from the daily tier (see
+predictions.features.load_day_sums). series() serves range queries from the
+coarsest tier that satisfies the requested resolution.
+"""
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+from migraine_backend import versions
+
+from .models import Biometrics, BiometricsRollup
+
+METRICS = [
+    'heart_rate', 'hrv', 'resting_heart_rate', 'systolic_bp', 'diastolic_bp',
+    'steps', 'calories_burned', 'weight', 'body_temperature'
+]
+
+# Tiers from coarsest to finest, with their bucket length
+TIERS = [
+    ('day', timedelta(days=1)),
+    ('hour', timedelta(hours=1)),
+    ('raw', timedelta(0)),
+]
+
+# Raw samples deleted per statement when enforcing retention
+DELETE_BATCH_SIZE = 10_000
+
+
+def retention_cutoff():
+    """First local day still kept as raw samples, or None when retention is off."""
+    if not settings.BIOMETRICS_RAW_RETENTION_DAYS:
+        return None
+    return timezone.localdate() - timedelta(days=settings.BIOMETRICS_RAW_RETENTION_DAYS)
+
+
+def rollup_range(user_id, start, end, include_expired=False):
+    """
+    Rebuild the hourly and daily rollups of one user for the days covering
+    [start, end]. Days before the retention cutoff are skipped unless
+    include_expired is set, because their raw samples may already be gone.
+    """
+    first_day = timezone.localtime(start).date()
+    last_day = timezone.localtime(end).date()
+    cutoff = retention_cutoff()
+    if cutoff and not include_expired:
+        first_day = max(first_day, cutoff)
+    if first_day > last_day:
+        return 0
+    
+    range_start = day_start(first_day)
+    range_end = day_start(last_day + timedelta(days=1))
+    
+    hours = Biometrics.objects.filter(
+        user_id=user_id,
+        timestamp__gte=range_start,
+        timestamp__lt=range_end
+    ).order_by().annotate(bucket=TruncHour('timestamp')).values('bucket').annotate(**_metric_aggregates())
+    
+    rows = []
+    days = {}
+    for bucket in hours:
+        day = days.setdefault(timezone.localtime(bucket['bucket']).date(), {})
+        for metric in METRICS:
+            stats = _bucket_stats(bucket, metric)
+            if stats is None:
+                continue
+            rows.append(BiometricsRollup(
+                user_id=user_id, resolution='hour', bucket_start=bucket['bucket'], metric=metric, **stats
+            ))
+            _fold(day, metric, stats)
+    
+    for date, metrics in days.items():
+        for metric, stats in metrics.items():
+            rows.append(BiometricsRollup(
+                user_id=user_id, resolution='day', bucket_start=day_start(date), metric=metric, **stats
+            ))
+    
+    with transaction.atomic():
+        BiometricsRollup.objects.filter(
+            user_id=user_id,
+            bucket_start__gte=range_start,
+            bucket_start__lt=range_end
+        ).delete()
+        BiometricsRollup.objects.bulk_create(rows, batch_size=1000)
+    
+    return len(rows)
+
+
+def rollup_days(user_id, days, include_expired=False):
+    """Rebuild the rollups of the given local days, one rollup_range per run of consecutive days."""
+    written = 0
+    for first, last in _runs(days):
+        written += rollup_range(user_id, day_start(first), day_start(last), include_expired)
+    return written
+
+
+def closed_days(user_id, days):
+    """
+    Days among `days` before the retention cutoff that are already in the
+    daily tier with their raw samples gone. New samples for them can neither
+    be deduplicated nor rolled up without replacing the day's rollups.
+    """
+    cutoff = retention_cutoff()
+    days = {day for day in days if cutoff and day < cutoff}
+    if not days:
+        return set()
+    
+    rolled = {
+        timezone.localtime(bucket_start).date()
+        for bucket_start in BiometricsRollup.objects.filter(
+            user_id=user_id,
+            resolution='day',
+            bucket_start__in=[day_start(day) for day in days]
+        ).values_list('bucket_start', flat=True).distinct()
+    }
+    if not rolled:
+        return set()
+    
+    with_raw = set(
+        Biometrics.objects.filter(
+            user_id=user_id,
+            timestamp__gte=day_start(min(rolled)),
+            timestamp__lt=day_start(max(rolled) + timedelta(days=1))
+        ).annotate(day=TruncDate('timestamp')).order_by().values_list('day', flat=True).distinct()
+    )
+    return rolled - with_raw
+
+
+def rollup_recent(since):
+    """Roll up every user with samples created since `since`; returns rows written."""
+    ranges = Biometrics.objects.filter(created_at__gte=since).order_by().values('user_id').annotate(
+        first=Min('timestamp'),
+        last=Max('timestamp')
+    )
+    return sum(rollup_range(row['user_id'], row['first'], row['last']) for row in ranges)
+
+
+def backfill(user_ids=None):
+    """Roll up all raw samples of the given users (default: everyone)."""
+    samples = Biometrics.objects.all()
+    if user_ids is not None:
+        samples = samples.filter(user_id__in=user_ids)
+    # By day, so days that only exist in the daily tier are left alone
+    days = {}
+    for user_id, day in samples.annotate(day=TruncDate('timestamp')).order_by().values_list('user_id', 'day').distinct():
+        days.setdefault(user_id, []).append(day)
+    return sum(rollup_days(user_id, user_days, include_expired=True) for user_id, user_days in days.items())
+
+
+def enforce_retention():
+    """
+    Roll up and then delete raw samples older than the retention cutoff.
+    Returns the number of samples deleted.
+    """
+    cutoff = retention_cutoff()
+    if cutoff is None:
+        return 0
+    
+    expired = Biometrics.objects.filter(timestamp__lt=day_start(cutoff))
+    
+    # Only days that still have raw samples are rebuilt, and they hold all of
+    # them: retention removes whole days, and history imports only add to
+    # days that are not closed. Days in between may exist only in the daily tier.
+    expired_days = {}
+    for user_id, day in expired.annotate(day=TruncDate('timestamp')).order_by().values_list('user_id', 'day').distinct():
+        expired_days.setdefault(user_id, []).append(day)
+    for user_id, days in expired_days.items():
+        rollup_days(user_id, days, include_expired=True)
+    user_ids = list(expired_days)
+    
+    # _raw_delete skips the per-row delete signals: these days now live in the
+    # daily tier, so the feature store and cached predictions stay valid. Only
+    # the raw listings change.
+    deleted = 0
+    while True:
+        ids = list(expired.order_by().values_list('pk', flat=True)[:DELETE_BATCH_SIZE])
+        if not ids:
+            versions.bump_many(user_ids, Biometrics)
+            return deleted
+        deleted += Biometrics.objects.filter(pk__in=ids)._raw_delete(Biometrics.objects.db)
+
+
+def choose_tier(start, end, resolution=None):
+    """
+    Coarsest tier whose buckets are no longer than `resolution` (a timedelta;
+    default: the span divided by BIOMETRICS_SERIES_MAX_POINTS). Falls back to
+    hourly when the range reaches past retained raw samples.
+    """
+    if resolution is None:
+        resolution = (end - start) / settings.BIOMETRICS_SERIES_MAX_POINTS
+    
+    tier = next(name for name, length in TIERS if length <= resolution)
+    cutoff = retention_cutoff()
+    if tier == 'raw' and cutoff and start < day_start(cutoff):
+        tier = 'hour'
+    return tier
+
+
+def series(user, start, end, metrics, tier):
+    """Points per metric in [start, end) as {metric: [{t, min, max, mean, count}]}."""
+    points = {metric: [] for metric in metrics}
+    
+    if tier == 'raw':
+        samples = Biometrics.objects.filter(
+            user=user,
+            timestamp__gte=start,
+            timestamp__lt=end
+        ).order_by('timestamp').values_list('timestamp', *metrics)[:settings.BIOMETRICS_SERIES_MAX_POINTS]
+        for timestamp, *values in samples:
+            for metric, value in zip(metrics, values):
+                if value is not None:
+                    points[metric].append(
+                        {'t': timestamp, 'min': value, 'max': value, 'mean': value, 'count': 1}
+                    )
+        return points
+    
+    rollups = BiometricsRollup.objects.filter(
+        user=user,
+        resolution=tier,
+        metric__in=metrics,
+        bucket_start__gte=start,
+        bucket_start__lt=end
+    ).order_by('metric', 'bucket_start').values_list(
+        'metric', 'bucket_start', 'min_value', 'max_value', 'sum_value', 'count'
+    )
+    for metric, bucket_start, min_value, max_value, sum_value, count in rollups:
+        points[metric].append({
+            't': bucket_start,
+            'min': min_value,
+            'max': max_value,
+            'mean': round(sum_value / count, 2),
+            'count': count
+        })
+    return points
+
+
+def daily_biometric_sums(user_ids, start_date=None, end_date=None):
+    """
+    Feature day sums (bio_count, hrv_sum, hrv_count) for [start_date, end_date)
+    from the daily tier, as rows shaped like the raw grouped query.
+    """
+    rollups = BiometricsRollup.objects.filter(
+        user_id__in=user_ids,
+        resolution='day',
+        metric__in=['heart_rate', 'hrv']
+    )
+    if start_date is not None:
+        rollups = rollups.filter(bucket_start__gte=day_start(start_date))
+    if end_date is not None:
+        rollups = rollups.filter(bucket_start__lt=day_start(end_date))
+    
+    days = {}
+    for user_id, bucket_start, metric, sum_value, count in rollups.values_list(
+        'user_id', 'bucket_start', 'metric', 'sum_value', 'count'
+    ):
+        date = timezone.localtime(bucket_start).date()
+        row = days.setdefault((user_id, date), {
+            'user_id': user_id, 'date': date, 'bio_count': 0, 'hrv_sum': None, 'hrv_count': 0
+        })
+        if metric == 'heart_rate':
+            # heart_rate is required, so its count is the sample count
+            row['bio_count'] = count
+        else:
+            row['hrv_sum'] = sum_value
+            row['hrv_count'] = count
+    return list(days.values())
+
+
+def _metric_aggregates():
+    aggregates = {}
+    for metric in METRICS:
+        aggregates[f'{metric}_min'] = Min(metric)
+        aggregates[f'{metric}_max'] = Max(metric)
+        aggregates[f'{metric}_sum'] = Sum(metric)
+        aggregates[f'{metric}_count'] = Count(metric)
+    return aggregates
+
+
+def _bucket_stats(bucket, metric):
+    count = bucket[f'{metric}_count']
+    if not count:
+        return None
+    return {
+        'min_value': Decimal(str(bucket[f'{metric}_min'])),
+        'max_value': Decimal(str(bucket[f'{metric}_max'])),
+        'sum_value': Decimal(str(bucket[f'{metric}_sum'])),
+        'count': count,
+    }
+
+
+def _fold(day, metric, stats):
+    """Merge an hourly bucket into the running daily stats of a metric."""
+    current = day.get(metric)
+    if current is None:
+        day[metric] = dict(stats)
+        return
+    current['min_value'] = min(current['min_value'], stats['min_value'])
+    current['max_value'] = max(current['max_value'], stats['max_value'])
+    current['sum_value'] += stats['sum_value']
+    current['count'] += stats['count']
+
+
+def _runs(days):
+    """(first, last) of each run of consecutive days."""
+    runs = []
+    for day in sorted(set(days)):
+        if runs and day == runs[-1][1] + timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+def day_start(date):
+    """Aware local midnight at the start of date."""
+    return datetime.combine(date, time.min, tzinfo=timezone.get_current_timezone())
@@ -1,5 +1,8 @@
+from django.utils import timezone
 from rest_framework import serializers
+from migraine_backend.serializers import ValuesListSerializer
 from .models import Biometrics
+from . import rollups
 
 
 class BiometricsSerializer(serializers.ModelSerializer):
@@ -11,10 +14,43 @@ class BiometricsSerializer(serializers.ModelSerializer):
             'id', 'user', 'timestamp', 'heart_rate', 'hrv',
             'resting_heart_rate', 'systolic_bp', 'diastolic_bp',
             'steps', 'calories_burned', 'weight', 'body_temperature',
-            'data_source', 'created_at'
+            'data_source', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'user', 'created_at']
+        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+    
+    def validate_timestamp(self, value):
+        day = timezone.localtime(value).date()
+        if rollups.closed_days(self.context['request'].user.id, [day]):
+            raise serializers.ValidationError('This day is already rolled up and its raw samples were deleted.')
+        return value
+    
+    def validate(self, attrs):
+        # The (user, timestamp, data_source) constraint can't be checked by DRF
+        # because user is read-only
+        duplicates = Biometrics.objects.filter(
+            user=self.context['request'].user,
+            timestamp=attrs.get('timestamp', getattr(self.instance, 'timestamp', None)),
+            data_source=attrs.get('data_source', getattr(self.instance, 'data_source', 'manual'))
+        )
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError('A sample with this timestamp and data source already exists.')
+        return attrs
     
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
+        instance = super().create(validated_data)
+        
+        # Expired days are skipped by the rollup sweep and read from the daily tier
+        day = timezone.localtime(instance.timestamp).date()
+        cutoff = rollups.retention_cutoff()
+        if cutoff and day < cutoff:
+            rollups.rollup_days(instance.user_id, [day], include_expired=True)
+        return instance
+
+
+class BiometricsListSerializer(ValuesListSerializer):
+    """Fast list rendering with the same output as BiometricsSerializer."""
+    
+    model_serializer = BiometricsSerializer
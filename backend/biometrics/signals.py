@@ -0,0 +1,48 @@
+"""
+Signal handlers keeping biometrics rollups in sync with edited and deleted
+samples. New samples are picked up by the hourly rollup_biometrics sweep.
+"""
+
+from django.db import connections, transaction
+from django.db.models.signals import pre_migrate, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Biometrics
+from . import duplicates
+
+
+@receiver(pre_migrate)
+def delete_duplicate_samples(sender, app_config=None, using='default', **kwargs):
+    """Clear repeated samples so migrate can add the (user, timestamp, data_source) key."""
+    if app_config is None or app_config.label != Biometrics._meta.app_label:
+        return
+    
+    connection = connections[using]
+    if not duplicates.has_unique_key(connection):
+        duplicates.delete_duplicates(connection)
+
+
+@receiver(pre_save, sender=Biometrics)
+def remember_previous_timestamp(sender, instance, raw=False, **kwargs):
+    """Record the timestamp an existing sample is moving away from."""
+    if raw or instance.pk is None:
+        return
+    
+    instance._rollup_previous_timestamp = (
+        sender.objects.filter(pk=instance.pk).values_list('timestamp', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Biometrics)
+@receiver(post_delete, sender=Biometrics)
+def refresh_rollups(sender, instance, created=False, raw=False, **kwargs):
+    """Rebuild the rollup days an edited or deleted sample touched."""
+    if raw or created:
+        return
+    
+    from .tasks import rollup_user_biometrics
+    
+    timestamps = [instance.timestamp, getattr(instance, '_rollup_previous_timestamp', None)]
+    timestamps = [timestamp for timestamp in timestamps if timestamp]
+    start, end = min(timestamps).isoformat(), max(timestamps).isoformat()
+    transaction.on_commit(lambda: rollup_user_biometrics.delay(instance.user_id, start, end))
@@ -0,0 +1,41 @@
+from celery import shared_task
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import partitioning, rollups
+
+
+@shared_task
+def rollup_biometrics():
+    """Roll up samples created since the last run (hourly)."""
+    since = timezone.now() - timedelta(minutes=settings.BIOMETRICS_ROLLUP_LOOKBACK_MINUTES)
+    written = rollups.rollup_recent(since)
+    return f"Wrote {written} rollup rows"
+
+
+@shared_task
+def rollup_user_biometrics(user_id, start, end):
+    """Rebuild one user's rollups after samples were edited or deleted."""
+    start, end = (_aware(parse_datetime(value)) for value in (start, end))
+    written = rollups.rollup_range(user_id, start, end)
+    return f"Wrote {written} rollup rows for user {user_id}"
+
+
+@shared_task
+def enforce_biometrics_retention():
+    """Delete raw samples past BIOMETRICS_RAW_RETENTION_DAYS once rolled up (daily)."""
+    deleted = rollups.enforce_retention()
+    return f"Deleted {deleted} raw samples"
+
+
+@shared_task
+def ensure_biometrics_partitions():
+    """Create upcoming monthly partitions when biometrics is partitioned (monthly)."""
+    created = partitioning.ensure_partitions()
+    return f"Created {created} biometrics partitions"
+
+
+def _aware(value):
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
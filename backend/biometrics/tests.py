@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import Biometrics
+
+User = get_user_model()
+
+
+class BulkIngestValidationTests(TestCase):
+    """Malformed samples are rejected one by one instead of failing the request."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='wearer', email='wearer@example.com', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def ingest(self, items):
+        return self.client.post('/api/biometrics/bulk/', items, format='json')
+    
+    def test_impossible_timestamp_is_a_row_error(self):
+        response = self.ingest([
+            {'timestamp': '2026-02-30T10:00:00Z', 'heart_rate': 70},
+            {'timestamp': '2026-02-27T10:00:00Z', 'heart_rate': 71},
+        ])
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['rejected'], 1)
+        self.assertEqual(response.data['errors'][0]['index'], 0)
+        self.assertIn('timestamp', response.data['errors'][0]['errors'])
+        self.assertEqual(Biometrics.objects.filter(user=self.user).count(), 1)
+    
+    def test_non_string_data_source_is_a_row_error(self):
+        response = self.ingest([
+            {'timestamp': '2026-02-27T10:00:00Z', 'heart_rate': 70, 'data_source': ['apple_watch']},
+            {'timestamp': '2026-02-27T11:00:00Z', 'heart_rate': 70, 'data_source': {'name': 'fitbit'}},
+            {'timestamp': '2026-02-27T12:00:00Z', 'heart_rate': 71, 'data_source': 'fitbit'},
+        ])
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['rejected'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [0, 1])
+        self.assertTrue(all('data_source' in error['errors'] for error in response.data['errors']))
@@ -1,19 +1,103 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
+from migraine_backend.conditional import ConditionalMixin
+from migraine_backend.pagination import SyncCursorPagination, SinceFilter
+from migraine_backend.serializers import FastListMixin
 from .models import Biometrics
-from .serializers import BiometricsSerializer
+from .serializers import BiometricsSerializer, BiometricsListSerializer
+from .parsers import NDJSONParser, TooManySamples
+from . import ingest, rollups
 
 
-class BiometricsViewSet(viewsets.ModelViewSet):
+class BiometricsViewSet(ConditionalMixin, FastListMixin, viewsets.ModelViewSet):
     """ViewSet for Biometrics CRUD operations."""
     
     serializer_class = BiometricsSerializer
+    list_serializer_class = BiometricsListSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, SinceFilter]
+    pagination_class = SyncCursorPagination
+    sync_field = 'updated_at'
     filterset_fields = ['timestamp', 'data_source']
     ordering_fields = ['timestamp']
     ordering = ['-timestamp']
+    # series is left out: rollups change on their own schedule
+    conditional_models = {'list': [Biometrics], 'retrieve': [Biometrics]}
     
     def get_queryset(self):
         return Biometrics.objects.filter(user=self.request.user)
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """Ingest a JSON array or NDJSON stream of samples from a wearable sync."""
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {'detail': 'Expected a JSON array or NDJSON stream of samples.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # NDJSON streams are cut off by the parser; JSON arrays are checked here
+        if len(items) > settings.BIOMETRICS_INGEST_MAX_ROWS:
+            raise TooManySamples()
+        
+        result = ingest.ingest(request.user, items)
+        return Response(result, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        """
+        Time series of metrics between start and end (default: the last 7 days)
+        from the coarsest tier matching `resolution` (raw, hour or day; default:
+        about BIOMETRICS_SERIES_MAX_POINTS buckets over the range).
+        """
+        end = _datetime_param(request, 'end') or timezone.now()
+        start = _datetime_param(request, 'start') or end - timedelta(days=7)
+        if start >= end:
+            raise ValidationError({'start': 'Must be before end.'})
+        
+        metrics = request.query_params.get('metrics')
+        metrics = metrics.split(',') if metrics else rollups.METRICS
+        unknown = [metric for metric in metrics if metric not in rollups.METRICS]
+        if unknown:
+            raise ValidationError({'metrics': f'Unknown metrics: {", ".join(unknown)}.'})
+        
+        resolution = request.query_params.get('resolution')
+        lengths = dict(rollups.TIERS)
+        if resolution is not None and resolution not in lengths:
+            raise ValidationError({'resolution': f'Must be one of: {", ".join(lengths)}.'})
+        
+        tier = rollups.choose_tier(start, end, lengths.get(resolution))
+        return Response({
+            'start': start,
+            'end': end,
+            'resolution': tier,
+            'metrics': rollups.series(request.user, start, end, metrics, tier)
+        })
+
+
+def _datetime_param(request, name):
+    """Parse an optional ISO datetime or date query parameter."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    
+    try:
+        parsed = parse_datetime(value)
+        date = parse_date(value) if parsed is None else None
+    except ValueError:
+        parsed = date = None
+    
+    if date is not None:
+        return rollups.day_start(date)
+    if parsed is None:
+        raise ValidationError({name: 'Use an ISO 8601 date or datetime.'})
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
@@ -0,0 +1,119 @@
+"""
+Home screen payload assembled in one request.
+
+The payload combines today's prediction, the 7-day forecast, the 30-day
+summary, top triggers and weekly patterns. One window of per-day log and
+biometric sums and one list of recent migraine events are loaded lazily and
+shared by every section that needs them. Prediction sections still go
+through the prediction cache, so a cached forecast costs no queries.
+
+The ETag is derived from the user's prediction cache generation, which every
+DailyLog, Biometrics or MigraineEvent write bumps, the version of their
+Prediction rows (rewritten by the batch runs), plus the dates and model
+version the sections depend on. It can be checked before anything is built.
+"""
+
+import hashlib
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from analytics import patterns, summaries, triggers
+from migraine.models import MigraineEvent
+from migraine_backend import versions
+from predictions import cache as prediction_cache
+from predictions.features import load_day_sums
+from predictions.ml_engine import MigrainePredictionEngine
+from predictions.models import Prediction
+from predictions.scheduling import local_date
+from predictions.serializers import PredictionSerializer
+
+FORECAST_DAYS = 7
+
+
+class Dashboard:
+    """Lazily built dashboard sections for one user."""
+    
+    def __init__(self, user):
+        self.user = user
+        # The user's local date, which the daily run writes their prediction under
+        self.today = local_date(user.timezone)
+        self.engine = MigrainePredictionEngine(user)
+        self.pattern_days = settings.ANALYTICS_PATTERNS_DEFAULT_DAYS
+    
+    @cached_property
+    def etag(self):
+        parts = [
+            self.user.id,
+            prediction_cache.get_generation(self.user.id),
+            *versions.get_versions(self.user.id, [Prediction]),
+            self.today,
+            patterns.pattern_window_start(self.user, self.pattern_days),
+            self.engine.model_version,
+        ]
+        return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+    
+    def build(self):
+        return {
+            'today': self.today_prediction(),
+            'forecast': self.forecast(),
+            'summary': summaries.summary_from_window(self.today, self.events, self.day_sums),
+            'triggers': triggers.top_triggers(self.user),
+            'patterns': patterns.weekly_patterns_from_events(
+                self.user, self.pattern_days, [start_time for start_time, _ in self.events]
+            ),
+        }
+    
+    def today_prediction(self):
+        """Same payload as GET /api/predictions/today/."""
+        def load_prediction():
+            prediction = Prediction.objects.filter(user=self.user, date=self.today).first()
+            if not prediction:
+                result = self.engine.predict_from_features(self.window_features[0][1])
+                prediction = Prediction.objects.create(
+                    user=self.user,
+                    date=self.today,
+                    risk_score=result['risk_score'],
+                    risk_level=result['risk_level'],
+                    top_factors=result['top_factors'],
+                    confidence=result['confidence'],
+                    model_version=result['model_version'],
+                    recommendations=result['recommendations']
+                )
+            return dict(PredictionSerializer(prediction).data)
+        
+        return prediction_cache.get_or_compute(
+            self.user.id, 'prediction', self.today, self.engine.model_version, load_prediction
+        )
+    
+    def forecast(self):
+        """Same payload as the forecast list of GET /api/predictions/forecast/."""
+        return prediction_cache.get_or_compute(
+            self.user.id, 'forecast', self.today, self.engine.model_version,
+            lambda: self.engine.predict_next_7_days(daily=self.day_sums, first_date=self.today)
+        )
+    
+    @cached_property
+    def day_sums(self):
+        """Per-day log and biometric sums from the summary window through the forecast."""
+        start_date = min(summaries.summary_window_start(self.today), self.today - timedelta(days=7))
+        end_date = self.today + timedelta(days=FORECAST_DAYS)
+        return load_day_sums([self.user.id], start_date, end_date).get(self.user.id, {})
+    
+    @cached_property
+    def window_features(self):
+        return list(self.engine.extract_rolling_features(self.today, FORECAST_DAYS, daily=self.day_sums))
+    
+    @cached_property
+    def events(self):
+        """(start_time, severity) of migraines since the earliest summary or pattern window."""
+        summary_start = datetime.combine(
+            summaries.summary_window_start(self.today), time.min, tzinfo=timezone.get_current_timezone()
+        )
+        since = min(summary_start, patterns.pattern_window_start(self.user, self.pattern_days))
+        return list(
+            MigraineEvent.objects.filter(user=self.user, start_time__gte=since).order_by().values_list(
+                'start_time', 'severity'
+            )
+        )
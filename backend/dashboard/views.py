@@ -0,0 +1,32 @@
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from migraine_backend import versions
+
+from .builder import Dashboard
+
+
+class DashboardView(APIView):
+    """Everything the home screen shows, with ETag/If-None-Match support."""
+    
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        dashboard = Dashboard(request.user)
+        if not versions.enabled():
+            # The ETag inputs live in the cache: without one shared by every
+            # process it could miss writes made elsewhere
+            return Response(dashboard.build())
+        
+        etag = quote_etag(dashboard.etag)
+        
+        # Unchanged dashboards are answered before anything is computed
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None:
+            response = Response(dashboard.build())
+        
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,58 @@
+import gzip
+import os
+import time
+from pathlib import Path
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from . import datasets
+from .models import ExportJob
+
+
+def export_path(user_id, job_id, output):
+    return Path(settings.EXPORT_DIR) / str(user_id) / f'{job_id}.{output}.gz'
+
+
+@shared_task
+def export_user_history(job_id):
+    """Write a gzip-compressed export file for large histories."""
+    job = ExportJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return f"Export {job_id} no longer exists"
+    
+    ExportJob.objects.filter(pk=job.pk).update(status='running')
+    path = export_path(job.user_id, job.pk.hex, job.output)
+    partial = path.with_name(path.name + '.part')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(partial, 'wt', encoding='utf-8', newline='') as handle:
+            for line in datasets.stream(job.user_id, job.dataset, job.output):
+                handle.write(line)
+        
+        # Publish atomically so a download never sees a half-written file
+        os.replace(partial, path)
+    except Exception as exc:
+        partial.unlink(missing_ok=True)
+        ExportJob.objects.filter(pk=job.pk).update(status='failed', error=repr(exc), finished_at=timezone.now())
+        raise
+    
+    ExportJob.objects.filter(pk=job.pk).update(status='done', finished_at=timezone.now())
+    return str(path)
+
+
+@shared_task
+def purge_expired_exports():
+    """Delete export files and jobs older than EXPORT_FILE_MAX_AGE_HOURS (hourly)."""
+    cutoff = time.time() - settings.EXPORT_FILE_MAX_AGE_HOURS * 3600
+    removed = 0
+    for path in Path(settings.EXPORT_DIR).glob('*/*.gz*'):
+        if path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    
+    ExportJob.objects.filter(
+        created_at__lt=timezone.now() - timedelta(hours=settings.EXPORT_FILE_MAX_AGE_HOURS)
+    ).delete()
+    return f"Removed {removed} expired exports"
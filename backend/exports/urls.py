@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import ExportView, ExportJobCreateView, ExportJobView
+
+urlpatterns = [
+    path('jobs/', ExportJobCreateView.as_view(), name='export_job_create'),
+    path('jobs/<str:job_id>/', ExportJobView.as_view(), name='export_job'),
+    path('<str:dataset>/', ExportView.as_view(), name='export'),
+]
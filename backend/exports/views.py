@@ -0,0 +1,97 @@
+import logging
+import uuid
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import datasets
+from .models import ExportJob
+from .tasks import export_path, export_user_history
+
+logger = logging.getLogger(__name__)
+
+
+class ExportView(APIView):
+    """Stream a dataset of the user's history as CSV or NDJSON (?output=)."""
+    
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, dataset):
+        output = _validate(dataset, request.query_params.get('output', 'csv'))
+        # Each handler buffers the other kind of iterator whole
+        stream = datasets.astream if isinstance(request._request, ASGIRequest) else datasets.stream
+        response = StreamingHttpResponse(
+            stream(request.user.id, dataset, output),
+            content_type=datasets.OUTPUTS[output]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.{output}"'
+        return response
+
+
+class ExportJobCreateView(APIView):
+    """Start a background export written to a compressed file."""
+    
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        dataset = request.data.get('dataset', 'all')
+        output = _validate(dataset, request.data.get('output', 'ndjson'))
+        
+        job = ExportJob.objects.create(user=request.user, dataset=dataset, output=output)
+        transaction.on_commit(lambda: _enqueue(job))
+        
+        return Response({'job_id': job.pk.hex, 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+
+
+class ExportJobView(APIView):
+    """Status of a background export, or the file once it is done."""
+    
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, job_id):
+        try:
+            job = ExportJob.objects.get(pk=uuid.UUID(job_id), user=request.user)
+        except (ValueError, ExportJob.DoesNotExist):
+            raise NotFound('Unknown or expired export.')
+        
+        if job.status == 'failed':
+            return Response({'job_id': job.pk.hex, 'status': job.status, 'error': 'The export failed.'})
+        if job.status != 'done':
+            return Response({'job_id': job.pk.hex, 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+        
+        path = export_path(request.user.id, job.pk.hex, job.output)
+        if not path.exists():
+            raise NotFound('Unknown or expired export.')
+        
+        return FileResponse(
+            path.open('rb'),
+            as_attachment=True,
+            filename=path.name,
+            content_type='application/gzip'
+        )
+
+
+def _validate(dataset, output):
+    if output not in datasets.OUTPUTS:
+        raise ValidationError({'output': f'Must be one of: {", ".join(datasets.OUTPUTS)}.'})
+    if dataset == 'all' and output != 'ndjson':
+        raise ValidationError({'dataset': 'Exporting all datasets at once requires output=ndjson.'})
+    if dataset != 'all' and dataset not in datasets.DATASETS:
+        raise ValidationError({'dataset': f'Must be one of: all, {", ".join(datasets.DATASETS)}.'})
+    return output
+
+
+def _enqueue(job):
+    try:
+        export_user_history.delay(str(job.pk))
+    except Exception:
+        logger.exception("Could not queue export %s", job.pk)
+        ExportJob.objects.filter(pk=job.pk).update(
+            status='failed', error='Could not queue the export.', finished_at=timezone.now()
+        )
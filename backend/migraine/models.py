@@ -1,9 +1,27 @@
+from datetime import datetime, time, timedelta
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
 
+class MigraineEventQuerySet(models.QuerySet):
+    
+    def started_between(self, start_date=None, end_date=None):
+        """
+        Events starting on local days start_date..end_date (inclusive).
+        Filters start_time by a plain range so the (user, start_time) index
+        applies, unlike start_time__date lookups.
+        """
+        events = self
+        if start_date is not None:
+            events = events.filter(start_time__gte=_day_start(start_date))
+        if end_date is not None:
+            events = events.filter(start_time__lt=_day_start(end_date + timedelta(days=1)))
+        return events
+
+
 class MigraineEvent(models.Model):
     """Migraine/headache event tracking."""
     
@@ -66,9 +84,15 @@ class MigraineEvent(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = MigraineEventQuerySet.as_manager()
+    
     class Meta:
         db_table = 'migraine_events'
         ordering = ['-start_time']
+        indexes = [
+            models.Index(fields=['user', 'start_time'], name='migraine_user_start_idx'),
+            models.Index(fields=['user', 'updated_at'], name='migraine_user_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.start_time} (Severity: {self.severity})"
@@ -80,3 +104,7 @@ class MigraineEvent(models.Model):
             delta = self.end_time - self.start_time
             return round(delta.total_seconds() / 3600, 2)
         return None
+
+
+def _day_start(date):
+    return datetime.combine(date, time.min, tzinfo=timezone.get_current_timezone())
@@ -1,4 +1,6 @@
+from django.db.models import DurationField, ExpressionWrapper, F
 from rest_framework import serializers
+from migraine_backend.serializers import ValuesListSerializer
 from .models import MigraineEvent
 
 
@@ -20,3 +22,16 @@ class MigraineEventSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
+
+
+class MigraineEventListSerializer(ValuesListSerializer):
+    """Fast list rendering with the same output as MigraineEventSerializer."""
+    
+    model_serializer = MigraineEventSerializer
+    annotations = {
+        # Same rounding as MigraineEvent.duration_hours; NULL without an end_time
+        'duration_hours': (
+            ExpressionWrapper(F('end_time') - F('start_time'), output_field=DurationField()),
+            lambda delta: round(delta.total_seconds() / 3600, 2)
+        ),
+    }
@@ -1,19 +1,26 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from migraine_backend.conditional import ConditionalMixin
+from migraine_backend.pagination import SyncCursorPagination, SinceFilter
+from migraine_backend.serializers import FastListMixin
 from .models import MigraineEvent
-from .serializers import MigraineEventSerializer
+from .serializers import MigraineEventSerializer, MigraineEventListSerializer
 
 
-class MigraineEventViewSet(viewsets.ModelViewSet):
+class MigraineEventViewSet(ConditionalMixin, FastListMixin, viewsets.ModelViewSet):
     """ViewSet for MigraineEvent CRUD operations."""
     
     serializer_class = MigraineEventSerializer
+    list_serializer_class = MigraineEventListSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, SinceFilter]
+    pagination_class = SyncCursorPagination
+    sync_field = 'updated_at'
     filterset_fields = ['start_time', 'severity', 'pain_location']
     ordering_fields = ['start_time', 'severity']
     ordering = ['-start_time']
+    conditional_models = {'list': [MigraineEvent], 'retrieve': [MigraineEvent]}
     
     def get_queryset(self):
         return MigraineEvent.objects.filter(user=self.request.user)
@@ -14,9 +14,9 @@ app.autodiscover_tasks()
 
 # Scheduled tasks
 app.conf.beat_schedule = {
-    'generate-daily-predictions': {
-        'task': 'predictions.tasks.generate_daily_predictions',
-        'schedule': crontab(hour=6, minute=0),  # Every day at 6 AM
+    'schedule-local-morning-predictions': {
+        'task': 'predictions.tasks.schedule_local_morning_predictions',
+        'schedule': crontab(minute=0),  # Every hour, scores zones reaching local morning
     },
     'retrain-model-weekly': {
         'task': 'predictions.tasks.retrain_prediction_model',
@@ -26,6 +26,22 @@ app.conf.beat_schedule = {
         'task': 'analytics.tasks.aggregate_user_analytics',
         'schedule': crontab(hour=1, minute=0),  # Every day at 1 AM
     },
+    'rollup-biometrics': {
+        'task': 'biometrics.tasks.rollup_biometrics',
+        'schedule': crontab(minute=5),  # Every hour
+    },
+    'enforce-biometrics-retention': {
+        'task': 'biometrics.tasks.enforce_biometrics_retention',
+        'schedule': crontab(hour=3, minute=30),  # Every day at 3:30 AM
+    },
+    'ensure-biometrics-partitions': {
+        'task': 'biometrics.tasks.ensure_biometrics_partitions',
+        'schedule': crontab(day_of_month=1, hour=0, minute=30),  # Monthly, no-op unless partitioned
+    },
+    'purge-expired-exports': {
+        'task': 'exports.tasks.purge_expired_exports',
+        'schedule': crontab(minute=45),  # Every hour
+    },
 }
 
 @app.task(bind=True)
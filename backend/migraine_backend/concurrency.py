@@ -0,0 +1,32 @@
+"""
+Helpers for async views built on the synchronous ORM.
+
+Django's async ORM methods run every query on the request's single
+thread-sensitive worker, so awaiting several of them with asyncio.gather still
+executes them one after another. gather_queries instead runs each independent
+callable on its own pool thread, and therefore its own database connection, so
+the queries really overlap. Callables must be read-only and not depend on each
+other's results.
+"""
+
+import asyncio
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+async def gather_queries(*functions):
+    """Run independent sync query callables concurrently; results in argument order."""
+    return await asyncio.gather(*(
+        sync_to_async(_with_own_connection(function), thread_sensitive=False)()
+        for function in functions
+    ))
+
+
+def _with_own_connection(function):
+    def run():
+        try:
+            return function()
+        finally:
+            # Pool threads never see request_finished; honour CONN_MAX_AGE here
+            close_old_connections()
+    return run
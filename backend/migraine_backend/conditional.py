@@ -0,0 +1,71 @@
+"""
+HTTP conditional GETs for viewsets, validated by per-user data versions.
+
+ConditionalMixin computes the ETag and Last-Modified of an action from the
+versions of the tables it reads (see versions.py) after authentication and
+before the handler runs. A matching If-None-Match (or, without it, a recent
+enough If-Modified-Since) is answered with 304 without touching the database,
+serializers or aggregations.
+
+Without a shared cache (versions.enabled() is false) the mixin does nothing
+and every request gets a full response.
+"""
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from . import versions
+
+
+class NotModified(Exception):
+    """Short-circuits a view with the conditional response it carries."""
+    
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalMixin:
+    """
+    ViewSet mixin adding ETag/Last-Modified to GET and HEAD actions.
+    `conditional_models` maps action names to the models (and versions.TODAY)
+    their responses read; the ETag also covers the full request path and
+    conditional_extra(). Unlisted actions are served unconditionally.
+    """
+    
+    conditional_models = {}
+    
+    def conditional_extra(self, request):
+        """Other values the responses depend on, e.g. a model version."""
+        return []
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        
+        self.conditional_validators = None
+        models = self.conditional_models.get(self.action)
+        if models is None or request.method not in ('GET', 'HEAD') or not versions.enabled():
+            return
+        
+        etag, last_modified = self.conditional_validators = versions.validators(
+            request.user, models, [request.get_full_path(), *self.conditional_extra(request)]
+        )
+        response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            raise NotModified(response)
+    
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        
+        validators = getattr(self, 'conditional_validators', None)
+        if validators and response.status_code in (200, 304):
+            response['ETag'] = validators[0]
+            if validators[1] is not None:
+                response['Last-Modified'] = http_date(validators[1])
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
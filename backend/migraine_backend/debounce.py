@@ -0,0 +1,47 @@
+"""
+Per-user debounced Celery tasks.
+
+schedule() claims a (task, user) slot in the cache with cache.add once the
+current transaction commits and enqueues task(user_id) `delay` seconds later.
+Calls that find the slot taken are coalesced into that run, so a burst of
+writes costs one task. The task calls release() before it starts working,
+so a write landing mid-run schedules the next run. A broker error releases
+the slot and is logged instead of failing the committed write.
+"""
+
+import logging
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+SLOT_KEY = 'debounce:{task}:{user_id}'
+
+# Slot lifetime in delays; only matters if the queued task is lost
+SLOT_TIMEOUT_DELAYS = 5
+
+
+def schedule(task, user_id, delay):
+    """Run task(user_id) in `delay` seconds unless a run is already pending."""
+    transaction.on_commit(lambda: _enqueue(task, user_id, delay))
+
+
+def release(task, user_id):
+    """Let the next schedule() for this task and user enqueue a new run."""
+    cache.delete(_key(task, user_id))
+
+
+def _enqueue(task, user_id, delay):
+    key = _key(task, user_id)
+    if not cache.add(key, True, timeout=max(delay, 1) * SLOT_TIMEOUT_DELAYS):
+        return
+    
+    try:
+        task.apply_async((user_id,), countdown=delay)
+    except Exception:
+        cache.delete(key)
+        logger.exception("Could not queue %s for user %s", task.name, user_id)
+
+
+def _key(task, user_id):
+    return SLOT_KEY.format(task=task.name, user_id=user_id)
@@ -34,6 +34,8 @@ INSTALLED_APPS = [
     'migraine',
     'predictions',
     'analytics',
+    'exports',
+    'dashboard',
 ]
 
 MIDDLEWARE = [
@@ -79,6 +81,22 @@ DATABASES = {
     }
 }
 
+# Cache (Redis in production, local memory when REDIS_URL is unset)
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -106,7 +124,7 @@ AUTH_USER_MODEL = 'accounts.User'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -115,6 +133,9 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 50,
 }
 
+# Largest ?page_size accepted by cursor-paginated sync endpoints
+SYNC_MAX_PAGE_SIZE = config('SYNC_MAX_PAGE_SIZE', default=1000, cast=int)
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=config('JWT_ACCESS_TOKEN_LIFETIME', default=60, cast=int)),
@@ -122,8 +143,13 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': True,
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.CustomTokenRefreshSerializer',
 }
 
+# Auth user state cache: seconds per process, then in the shared cache
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30, cast=int)
+AUTH_USER_STATE_TIMEOUT = config('AUTH_USER_STATE_TIMEOUT', default=300, cast=int)
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -140,5 +166,43 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Predictions
+PREDICTION_CACHE_TIMEOUT = config('PREDICTION_CACHE_TIMEOUT', default=3600, cast=int)
+PREDICTION_CHUNK_SIZE = config('PREDICTION_CHUNK_SIZE', default=1000, cast=int)
+PREDICTION_LOCAL_HOUR = config('PREDICTION_LOCAL_HOUR', default=5, cast=int)
+# Seconds a burst of input writes is coalesced before today's prediction is recomputed (0 disables)
+PREDICTION_RECOMPUTE_DELAY = config('PREDICTION_RECOMPUTE_DELAY', default=60, cast=int)
+FEATURE_STORE_ENABLED = config('FEATURE_STORE_ENABLED', default=True, cast=bool)
+MODEL_ARTIFACT_DIR = config('MODEL_ARTIFACT_DIR', default=str(BASE_DIR / 'model_artifacts'))
+MODEL_TRAINING_CHUNK_SIZE = config('MODEL_TRAINING_CHUNK_SIZE', default=500, cast=int)
+MODEL_PUBLISH_POINTER = config('MODEL_PUBLISH_POINTER', default='CURRENT')
+MODEL_REGISTRY_CHECK_INTERVAL = config('MODEL_REGISTRY_CHECK_INTERVAL', default=30, cast=int)
+MODEL_SHADOW_ENABLED = config('MODEL_SHADOW_ENABLED', default=True, cast=bool)
+# Shadow submissions waiting or running per process; more are dropped
+MODEL_SHADOW_QUEUE_SIZE = config('MODEL_SHADOW_QUEUE_SIZE', default=100, cast=int)
+
+# Analytics
+ANALYTICS_SNAPSHOT_MAX_AGE = config('ANALYTICS_SNAPSHOT_MAX_AGE', default=900, cast=int)
+# Seconds a burst of log or migraine writes is coalesced into one snapshot refresh
+ANALYTICS_REFRESH_DELAY = config('ANALYTICS_REFRESH_DELAY', default=30, cast=int)
+ANALYTICS_PATTERNS_DEFAULT_DAYS = config('ANALYTICS_PATTERNS_DEFAULT_DAYS', default=30, cast=int)
+ANALYTICS_PATTERNS_MAX_DAYS = config('ANALYTICS_PATTERNS_MAX_DAYS', default=365, cast=int)
+ANALYTICS_CORRELATION_DAYS = config('ANALYTICS_CORRELATION_DAYS', default=90, cast=int)
+ANALYTICS_CHUNK_SIZE = config('ANALYTICS_CHUNK_SIZE', default=1000, cast=int)
+
+# Biometrics bulk ingest
+BIOMETRICS_INGEST_BATCH_SIZE = config('BIOMETRICS_INGEST_BATCH_SIZE', default=2000, cast=int)
+BIOMETRICS_INGEST_MAX_ROWS = config('BIOMETRICS_INGEST_MAX_ROWS', default=50000, cast=int)
+
+# Biometrics rollups (0 keeps raw samples forever)
+BIOMETRICS_RAW_RETENTION_DAYS = config('BIOMETRICS_RAW_RETENTION_DAYS', default=90, cast=int)
+BIOMETRICS_ROLLUP_LOOKBACK_MINUTES = config('BIOMETRICS_ROLLUP_LOOKBACK_MINUTES', default=90, cast=int)
+BIOMETRICS_SERIES_MAX_POINTS = config('BIOMETRICS_SERIES_MAX_POINTS', default=1000, cast=int)
+
+# History exports
+EXPORT_DIR = config('EXPORT_DIR', default=str(BASE_DIR / 'export_files'))
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+EXPORT_FILE_MAX_AGE_HOURS = config('EXPORT_FILE_MAX_AGE_HOURS', default=24, cast=int)
+
 # Weather API
 WEATHER_API_KEY = config('WEATHER_API_KEY', default='')
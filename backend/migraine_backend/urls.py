@@ -12,4 +12,6 @@ urlpatterns = [
     path('api/migraine-events/', include('migraine.urls')),
     path('api/predictions/', include('predictions.urls')),
     path('api/analytics/', include('analytics.urls')),
+    path('api/export/', include('exports.urls')),
+    path('api/dashboard/', include('dashboard.urls')),
 ]
@@ -0,0 +1,108 @@
+"""
+Per-user data versions for HTTP conditional requests.
+
+Each (table, user) pair has a version in the cache: the millisecond time of
+the last write to that user's rows in the table. Signals bump it, and so do
+the bulk paths that bypass signals. An ETag hashes the versions a response
+reads. The newest version doubles as Last-Modified, so a conditional GET
+costs one cache round trip and no queries. An evicted version is reseeded with
+the current time, which only turns the next request into a full response.
+
+Versions are only trusted with a cache shared by every web and Celery process
+(see enabled()); with a process-local cache a bump in one process would never
+reach the others, and they would keep answering 304 for changed data.
+"""
+
+import hashlib
+import time
+from datetime import datetime, time as dt_time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from predictions.scheduling import get_zone
+
+VERSION_KEY = 'versions:{table}:{user_id}'
+
+# Pseudo-model for responses that also change when the day rolls over
+TODAY = 'today'
+
+# Cache backends private to one process
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def enabled():
+    """Whether versions may answer 304s: only when the default cache is shared."""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def bump(user_id, model):
+    """Record a write to one user's rows of model."""
+    bump_many([user_id], model)
+
+
+def bump_many(user_ids, model):
+    """Record a write to several users' rows of model."""
+    keys = [_key(model, user_id) for user_id in user_ids]
+    if not keys:
+        return
+    
+    current = cache.get_many(keys)
+    now = _now_ms()
+    # Strictly increasing, so two writes within a millisecond still differ
+    cache.set_many({key: max(now, current.get(key, 0) + 1) for key in keys}, timeout=None)
+
+
+def get_versions(user_id, models):
+    """Versions of user_id's rows of each model, in order."""
+    keys = [_key(model, user_id) for model in models]
+    found = cache.get_many(keys)
+    
+    missing = [key for key in keys if key not in found]
+    if missing:
+        now = _now_ms()
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        found.update(cache.get_many(missing))
+    
+    return [found.get(key, 0) for key in keys]
+
+
+def validators(user, models, extra=()):
+    """
+    (ETag, Last-Modified timestamp in seconds) for a response that reads
+    user's rows of `models` (which may include TODAY) and depends on `extra`.
+    Last-Modified is None while its second is still running: a later write
+    in the same second would not move it, so If-Modified-Since could not see it.
+    """
+    stamps = get_versions(user.id, [model for model in models if model is not TODAY])
+    if TODAY in models:
+        stamps.append(_today_ms(user))
+    
+    digest = hashlib.md5(':'.join(map(str, [user.id, *stamps, *extra])).encode()).hexdigest()
+    last_modified = max(stamps) // 1000
+    if last_modified >= _now_ms() // 1000:
+        last_modified = None
+    return quote_etag(digest), last_modified
+
+
+def _key(model, user_id):
+    return VERSION_KEY.format(table=model._meta.db_table, user_id=user_id)
+
+
+def _today_ms(user):
+    # Latest of the server's and the user's local midnight: a date-dependent
+    # response may follow either calendar
+    midnights = [
+        datetime.combine(datetime.now(zone).date(), dt_time.min, tzinfo=zone)
+        for zone in (timezone.get_current_timezone(), get_zone(user.timezone))
+    ]
+    return int(max(midnights).timestamp() * 1000)
+
+
+def _now_ms():
+    return int(time.time() * 1000)
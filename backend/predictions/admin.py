@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Prediction
+from .models import Prediction, PredictionChunk, DailyFeature
 
 
 @admin.register(Prediction)
@@ -9,3 +9,19 @@ class PredictionAdmin(admin.ModelAdmin):
     search_fields = ['user__username']
     date_hierarchy = 'date'
     readonly_fields = ['created_at']
+
+
+@admin.register(PredictionChunk)
+class PredictionChunkAdmin(admin.ModelAdmin):
+    list_display = ['date', 'first_user_id', 'last_user_id', 'users_scored', 'users_failed', 'duration_seconds']
+    list_filter = ['date']
+    date_hierarchy = 'date'
+    readonly_fields = ['completed_at']
+
+
+@admin.register(DailyFeature)
+class DailyFeatureAdmin(admin.ModelAdmin):
+    list_display = ['user', 'date', 'log_count', 'bio_count', 'hrv_mean', 'cum_log_count']
+    search_fields = ['user__username']
+    date_hierarchy = 'date'
+    readonly_fields = ['updated_at']
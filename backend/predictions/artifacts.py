@@ -0,0 +1,115 @@
+"""
+Versioned model artifacts for the migraine risk model.
+
+Each trained version lives in its own directory under MODEL_ARTIFACT_DIR:
+
+    <version>/weights.npy   intercept followed by one coefficient per feature
+    <version>/scaler.npy    2 x n_features array of feature means and scales
+    <version>/schema.json   feature order, training metadata, metrics and the
+                            probability thresholds of the risk levels
+
+Pointer files next to the version directories (CURRENT, and CANDIDATE for
+shadow scoring) name the versions in use; see registry.py.
+"""
+
+import json
+import os
+import numpy as np
+from pathlib import Path
+from django.conf import settings
+
+CURRENT_POINTER = 'CURRENT'
+
+# Risk score cut-offs between low/moderate and moderate/high
+RISK_LEVEL_CUTOFFS = (30, 70)
+
+
+class RiskModel:
+    """Logistic-regression risk model loaded from a version directory."""
+    
+    def __init__(self, version, features, weights, scaler, metadata=None):
+        self.version = version
+        self.features = list(features)
+        self.weights = weights
+        self.mean, self.scale = scaler
+        self.metadata = metadata or {}
+    
+    @classmethod
+    def load(cls, path):
+        """Load a version directory; the arrays are memory-mapped, not read."""
+        path = Path(path)
+        schema = json.loads((path / 'schema.json').read_text())
+        return cls(
+            version=schema['version'],
+            features=schema['features'],
+            weights=np.load(path / 'weights.npy', mmap_mode='r'),
+            scaler=np.load(path / 'scaler.npy', mmap_mode='r'),
+            metadata=schema
+        )
+    
+    def save(self, path):
+        """Write the artifacts into a new version directory."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=False)
+        np.save(path / 'weights.npy', np.asarray(self.weights, dtype=float))
+        np.save(path / 'scaler.npy', np.vstack([self.mean, self.scale]).astype(float))
+        schema = dict(self.metadata, version=self.version, features=self.features)
+        (path / 'schema.json').write_text(json.dumps(schema, indent=2, default=str))
+    
+    def predict_proba(self, columns):
+        """
+        Migraine onset probability for feature columns.
+        columns: mapping of feature name to a scalar or array; None/NaN is imputed.
+        """
+        matrix = np.column_stack([
+            np.asarray(_as_float(columns[name]), dtype=float).reshape(-1)
+            for name in self.features
+        ])
+        return self.predict_proba_matrix(matrix)
+    
+    def predict_proba_matrix(self, matrix):
+        """Probability for a raw (unscaled) feature matrix in schema order."""
+        matrix = np.where(np.isnan(matrix), self.mean, matrix)
+        z = ((matrix - self.mean) / self.scale) @ self.weights[1:] + self.weights[0]
+        return 1 / (1 + np.exp(-z))
+    
+    def risk_scores(self, columns):
+        """
+        Risk scores (0-100) for feature columns.
+        The probability is mapped piecewise-linearly so the schema's
+        risk_thresholds land on RISK_LEVEL_CUTOFFS; without them it is scaled.
+        """
+        probabilities = self.predict_proba(columns)
+        thresholds = self.metadata.get('risk_thresholds')
+        if not thresholds:
+            return np.clip(probabilities * 100, 0, 100)
+        return np.interp(probabilities, [0, *thresholds, 1], [0, *RISK_LEVEL_CUTOFFS, 100])
+
+
+def artifact_dir():
+    return Path(settings.MODEL_ARTIFACT_DIR)
+
+
+def read_pointer(name=CURRENT_POINTER):
+    """Return the version named by a pointer file, or None."""
+    try:
+        return (artifact_dir() / name).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_pointer(version, name=CURRENT_POINTER):
+    """Atomically point a pointer file at version."""
+    directory = artifact_dir()
+    tmp_path = directory / f'.{name}.tmp'
+    tmp_path.write_text(version)
+    os.replace(tmp_path, directory / name)
+
+
+def _as_float(value):
+    # Aggregates may be Decimal or None
+    if value is None:
+        return np.nan
+    if isinstance(value, np.ndarray):
+        return value
+    return float(value)
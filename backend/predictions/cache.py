@@ -0,0 +1,124 @@
+"""
+Prediction result cache.
+
+Entries are keyed by user, target date and model version, and namespaced by a
+per-user data generation. Writes to a user's DailyLog, Biometrics or
+MigraineEvent rows bump the generation (see signals.py), which orphans every
+cached entry for that user without touching other users.
+"""
+
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+GENERATION_KEY = 'predictions:generation:{user_id}'
+ENTRY_KEY = 'predictions:{kind}:{user_id}:{generation}:{date}:{model_version}'
+STATS_KEY = 'predictions:stats:{outcome}'
+
+
+def get_generation(user_id):
+    """Return the current data generation for a user, initializing it if needed."""
+    key = GENERATION_KEY.format(user_id=user_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Seed with the clock so an evicted counter never reuses an old value
+        cache.add(key, _now_ms(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_user(user_id):
+    """Invalidate every cached prediction for a single user."""
+    key = GENERATION_KEY.format(user_id=user_id)
+    current = cache.get(key) or 0
+    cache.set(key, max(_now_ms(), current + 1), timeout=None)
+
+
+def invalidate_users(user_ids):
+    """invalidate_user() for several users with two cache round trips."""
+    keys = [GENERATION_KEY.format(user_id=user_id) for user_id in user_ids]
+    if not keys:
+        return
+    
+    current = cache.get_many(keys)
+    now = _now_ms()
+    cache.set_many({key: max(now, (current.get(key) or 0) + 1) for key in keys}, timeout=None)
+
+
+def get_or_compute(user_id, kind, target_date, model_version, compute):
+    """Return the cached value for the key, calling compute() on a miss."""
+    key = _entry_key(user_id, kind, target_date, model_version)
+    value = cache.get(key)
+    
+    if value is None:
+        _record('misses')
+        value = compute()
+        cache.set(key, value, timeout=settings.PREDICTION_CACHE_TIMEOUT)
+    else:
+        _record('hits')
+    
+    return value
+
+
+async def aget_or_compute(user_id, kind, target_date, model_version, compute):
+    """Async get_or_compute; compute is a coroutine function."""
+    key = await sync_to_async(_entry_key)(user_id, kind, target_date, model_version)
+    value = await cache.aget(key)
+    
+    if value is None:
+        await sync_to_async(_record)('misses')
+        value = await compute()
+        await cache.aset(key, value, timeout=settings.PREDICTION_CACHE_TIMEOUT)
+    else:
+        await sync_to_async(_record)('hits')
+    
+    return value
+
+
+def store(user_id, kind, target_date, model_version, value):
+    """Write through a freshly computed value."""
+    key = _entry_key(user_id, kind, target_date, model_version)
+    cache.set(key, value, timeout=settings.PREDICTION_CACHE_TIMEOUT)
+
+
+def get_stats():
+    """Return hit/miss counters shared by all processes using the cache."""
+    hits = cache.get(STATS_KEY.format(outcome='hits'), 0)
+    misses = cache.get(STATS_KEY.format(outcome='misses'), 0)
+    total = hits + misses
+    
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None
+    }
+
+
+def reset_stats():
+    """Reset the hit/miss counters."""
+    cache.delete_many([STATS_KEY.format(outcome=outcome) for outcome in ('hits', 'misses')])
+
+
+def _entry_key(user_id, kind, target_date, model_version):
+    return ENTRY_KEY.format(
+        kind=kind,
+        user_id=user_id,
+        generation=get_generation(user_id),
+        date=target_date.isoformat(),
+        model_version=model_version
+    )
+
+
+def _record(outcome):
+    key = STATS_KEY.format(outcome=outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Counter missing or evicted
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def _now_ms():
+    return int(time.time() * 1000)
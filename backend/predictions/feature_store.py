@@ -0,0 +1,192 @@
+"""
+Incrementally maintained per-user daily feature store (see DailyFeature).
+
+Writes: refresh_days() recomputes the daily sums for the touched days from raw
+rows and shifts the running totals of every later day by the difference with
+one UPDATE, so a new log or biometric sample costs a handful of queries no
+matter how long the user's history is. backfill() rebuilds users in bulk.
+
+Reads: window_sums() returns the sums for any date range from two rows.
+
+Only users with a FeatureCoverage row (backfilled, or signed up with no
+history) are read or maintained; for anyone else the store would hold just
+the days written since deploy, so reads return None and callers aggregate
+raw rows instead.
+"""
+
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+
+from .features import WindowFeatures, DAY_SUM_COLUMNS, load_day_sums
+from .models import DailyFeature, FeatureCoverage
+
+User = get_user_model()
+
+CUMULATIVE_FIELDS = [f'cum_{column}' for column in DAY_SUM_COLUMNS]
+
+# Windows precomputed for analytics and predictions, in days
+ROLLING_WINDOWS = (7, 30, 60)
+
+# {user_id: days} touched by writes whose transaction has not committed yet
+_pending = threading.local()
+
+
+def refresh_days(user_id, days):
+    """Recompute the given days for one user and propagate the change forward."""
+    days = sorted(set(days))
+    if not days or not FeatureCoverage.objects.filter(user_id=user_id).exists():
+        return
+    
+    fresh = load_day_sums([user_id], days[0], days[-1] + timedelta(days=1)).get(user_id, {})
+    
+    with transaction.atomic():
+        # Lock every row whose running totals may shift
+        locked = DailyFeature.objects.select_for_update().filter(user_id=user_id, date__gte=days[0])
+        existing = {row.date: row for row in locked if row.date in days}
+        
+        for day in days:
+            _apply_day(user_id, day, existing.get(day), fresh.get(day, {}))
+
+
+def refresh_days_on_commit(user_id, days):
+    """
+    refresh_days() once the current transaction commits, merged with every
+    other write to the same user in it, so a bulk or cascade delete refreshes
+    each user once instead of once per row.
+    """
+    pending = getattr(_pending, 'days', None)
+    if pending is None:
+        pending = _pending.days = {}
+    pending.setdefault(user_id, set()).update(days)
+    # The first callback to run takes all of the user's days; later ones find none.
+    # Days left behind by a rollback are picked up by the user's next commit.
+    transaction.on_commit(lambda: refresh_days(user_id, pending.pop(user_id, ())))
+
+
+def window_sums(user_id, start_date, end_date=None):
+    """
+    Sums of every day column for days in [start_date, end_date) from two rows.
+    end_date=None means through the user's latest day.
+    Returns None when the user is not covered or has no feature rows before end_date.
+    """
+    # The coverage join rides along with the row lookups
+    rows = DailyFeature.objects.filter(user_id=user_id, user__feature_coverage__isnull=False).order_by('-date')
+    
+    upper = rows if end_date is None else rows.filter(date__lt=end_date)
+    upper = upper.values(*CUMULATIVE_FIELDS).first()
+    if upper is None:
+        return None
+    
+    lower = rows.filter(date__lt=start_date).values(*CUMULATIVE_FIELDS).first() or {}
+    return {
+        column: upper[f'cum_{column}'] - lower.get(f'cum_{column}', 0)
+        for column in DAY_SUM_COLUMNS
+    }
+
+
+def window_features(user_id, start_date, end_date):
+    """WindowFeatures for [start_date, end_date), or None if the store can't answer."""
+    totals = window_sums(user_id, start_date, end_date)
+    return WindowFeatures.from_sums(totals) if totals is not None else None
+
+
+def rolling_sums(user_id, end_date=None):
+    """Sums for each of ROLLING_WINDOWS ending the day before end_date (default: latest)."""
+    if end_date is None:
+        latest = DailyFeature.objects.filter(user_id=user_id).order_by('-date').values_list('date', flat=True).first()
+        if latest is None:
+            return None
+        end_date = latest + timedelta(days=1)
+    
+    return {
+        days: window_sums(user_id, end_date - timedelta(days=days), end_date)
+        for days in ROLLING_WINDOWS
+    }
+
+
+def backfill(user_ids=None, chunk_size=500):
+    """
+    Rebuild the store for the given users (default: everyone) in bulk and
+    mark them covered. Returns the number of DailyFeature rows written.
+    """
+    if user_ids is None:
+        user_ids = User.objects.order_by('id').values_list('id', flat=True)
+    user_ids = list(user_ids)
+    
+    written = 0
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        day_sums = load_day_sums(chunk)
+        
+        rows = []
+        for user_id, days in day_sums.items():
+            running = dict.fromkeys(DAY_SUM_COLUMNS, 0)
+            for day in sorted(days):
+                daily = _daily_values(days[day])
+                for column in DAY_SUM_COLUMNS:
+                    running[column] += daily[column]
+                rows.append(DailyFeature(
+                    user_id=user_id,
+                    date=day,
+                    **daily,
+                    **{f'cum_{column}': value for column, value in running.items()}
+                ))
+        
+        with transaction.atomic():
+            DailyFeature.objects.filter(user_id__in=chunk).delete()
+            DailyFeature.objects.bulk_create(rows, batch_size=1000)
+            FeatureCoverage.objects.bulk_create(
+                [FeatureCoverage(user_id=user_id) for user_id in chunk], ignore_conflicts=True
+            )
+        written += len(rows)
+    
+    return written
+
+
+def _apply_day(user_id, day, row, sums):
+    new = _daily_values(sums)
+    delta = {
+        column: new[column] - (getattr(row, column) if row else 0)
+        for column in DAY_SUM_COLUMNS
+    }
+    delta = {column: value for column, value in delta.items() if value}
+    if not delta:
+        return
+    
+    if any(new[column] for column in DAY_SUM_COLUMNS):
+        previous = DailyFeature.objects.filter(
+            user_id=user_id, date__lt=day
+        ).order_by('-date').values(*CUMULATIVE_FIELDS).first() or {}
+        DailyFeature.objects.update_or_create(
+            user_id=user_id,
+            date=day,
+            defaults={
+                **new,
+                **{
+                    f'cum_{column}': previous.get(f'cum_{column}', 0) + new[column]
+                    for column in DAY_SUM_COLUMNS
+                }
+            }
+        )
+    elif row:
+        # No data left for the day
+        row.delete()
+    
+    DailyFeature.objects.filter(user_id=user_id, date__gt=day).update(**{
+        f'cum_{column}': F(f'cum_{column}') + value
+        for column, value in delta.items()
+    })
+
+
+def _daily_values(sums):
+    """Daily column values (missing sums as zero) plus the HRV daily mean."""
+    values = {column: sums.get(column) or 0 for column in DAY_SUM_COLUMNS}
+    values['hrv_mean'] = (
+        round(Decimal(values['hrv_sum']) / values['hrv_count'], 2)
+        if values['hrv_count'] else None
+    )
+    return values
@@ -0,0 +1,129 @@
+"""
+Window features shared by the prediction engine, the feature store and training.
+
+Per-day sums and non-null counts (the *_day_sums() aggregates) can be added and
+subtracted across days, so any window's averages can be rebuilt from them
+without rescanning raw rows.
+"""
+
+from dataclasses import dataclass
+from django.db.models import Avg, Count, Sum
+from django.db.models.functions import TruncDate
+from logs.models import DailyLog
+from biometrics.models import Biometrics
+from biometrics import rollups
+
+
+@dataclass
+class WindowFeatures:
+    """Aggregated inputs for one prediction window; averages are None without data."""
+    
+    log_count: int = 0
+    avg_sleep: float = None
+    avg_stress: float = None
+    avg_water: float = None
+    avg_exercise: float = None
+    bio_count: int = 0
+    avg_hrv: float = None
+    
+    @classmethod
+    def from_sums(cls, totals):
+        """Build features from the running sums produced by *_day_sums()."""
+        def average(name):
+            count = totals.get(f'{name}_count')
+            return totals[f'{name}_sum'] / count if count else None
+        
+        return cls(
+            log_count=totals.get('log_count', 0),
+            avg_sleep=average('sleep'),
+            avg_stress=average('stress'),
+            avg_water=average('water'),
+            avg_exercise=average('exercise'),
+            bio_count=totals.get('bio_count', 0),
+            avg_hrv=average('hrv'),
+        )
+
+
+def log_window_aggregates():
+    """Aggregates over DailyLog rows backing WindowFeatures."""
+    return {
+        'log_count': Count('id'),
+        'avg_sleep': Avg('sleep_hours'),
+        'avg_stress': Avg('stress_level'),
+        'avg_water': Avg('water_intake'),
+        'avg_exercise': Avg('exercise_duration'),
+    }
+
+
+def biometric_window_aggregates():
+    """Aggregates over Biometrics rows backing WindowFeatures."""
+    return {
+        'bio_count': Count('id'),
+        'avg_hrv': Avg('hrv'),
+    }
+
+
+def log_day_sums():
+    """Per-day DailyLog sums and non-null counts, combinable across days."""
+    return {
+        'log_count': Count('id'),
+        'sleep_sum': Sum('sleep_hours'),
+        'sleep_count': Count('sleep_hours'),
+        'stress_sum': Sum('stress_level'),
+        'stress_count': Count('stress_level'),
+        'water_sum': Sum('water_intake'),
+        'water_count': Count('water_intake'),
+        'exercise_sum': Sum('exercise_duration'),
+        'exercise_count': Count('exercise_duration'),
+    }
+
+
+def biometric_day_sums():
+    """Per-day Biometrics sums and non-null counts, combinable across days."""
+    return {
+        'bio_count': Count('id'),
+        'hrv_sum': Sum('hrv'),
+        'hrv_count': Count('hrv'),
+    }
+
+
+# Column order of the combined per-day sums
+DAY_SUM_COLUMNS = list(log_day_sums()) + list(biometric_day_sums())
+
+
+def load_day_sums(user_ids, start_date=None, end_date=None):
+    """
+    Per-user per-day sums for days in [start_date, end_date), one grouped query per table.
+    Biometric days before the raw retention cutoff come from the daily rollup tier.
+    Returns: {user_id: {date: {column: value}}}
+    """
+    logs = DailyLog.objects.filter(user_id__in=user_ids)
+    biometrics = Biometrics.objects.filter(user_id__in=user_ids)
+    
+    if start_date is not None:
+        logs = logs.filter(date__gte=start_date)
+        biometrics = biometrics.filter(timestamp__gte=start_date)
+    if end_date is not None:
+        logs = logs.filter(date__lt=end_date)
+        biometrics = biometrics.filter(timestamp__lt=end_date)
+    
+    log_days = logs.order_by().values('user_id', 'date').annotate(**log_day_sums())
+    
+    cutoff = rollups.retention_cutoff()
+    rolled_days = []
+    if cutoff is not None and (start_date is None or start_date < cutoff):
+        biometrics = biometrics.filter(timestamp__gte=rollups.day_start(cutoff))
+        rolled_days = rollups.daily_biometric_sums(
+            user_ids, start_date, min(end_date, cutoff) if end_date else cutoff
+        )
+    
+    biometric_days = biometrics.order_by().annotate(
+        date=TruncDate('timestamp')
+    ).values('user_id', 'date').annotate(**biometric_day_sums())
+    
+    day_sums = {}
+    for row in list(log_days) + rolled_days + list(biometric_days):
+        user_days = day_sums.setdefault(row.pop('user_id'), {})
+        user_days.setdefault(row.pop('date'), {}).update(row)
+    
+    return day_sums
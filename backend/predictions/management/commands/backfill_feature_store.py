@@ -0,0 +1,17 @@
+import time
+from django.core.management.base import BaseCommand
+
+from predictions import feature_store
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyFeature store from raw DailyLog and Biometrics rows."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help="Only rebuild this user ID (repeatable)")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Users rebuilt per transaction")
+    
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = feature_store.backfill(options['users'], options['chunk_size'])
+        self.stdout.write(f"Wrote {written} feature rows in {time.monotonic() - started:.1f}s")
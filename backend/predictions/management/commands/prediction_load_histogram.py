@@ -0,0 +1,28 @@
+from datetime import date
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from predictions.scheduling import load_histogram
+
+
+class Command(BaseCommand):
+    help = "Show how many users the hourly prediction scheduler scores in each UTC hour."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="UTC day to report (YYYY-MM-DD, default today)")
+        parser.add_argument(
+            '--local-hour', type=int, default=settings.PREDICTION_LOCAL_HOUR,
+            help="Local hour at which users are scored"
+        )
+    
+    def handle(self, *args, **options):
+        day = date.fromisoformat(options['date']) if options['date'] else None
+        histogram = load_histogram(day, options['local_hour'])
+        total = sum(histogram.values())
+        peak = max(histogram.values()) or 1
+        
+        for hour, users in histogram.items():
+            bar = '#' * round(40 * users / peak)
+            self.stdout.write(f"{hour:02d}:00 UTC  {users:>8}  {bar}")
+        
+        self.stdout.write(f"Total: {total} users, peak hour: {max(histogram, key=histogram.get):02d}:00 UTC")
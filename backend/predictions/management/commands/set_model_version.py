@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.artifacts import artifact_dir, read_pointer, write_pointer, CURRENT_POINTER
+from predictions.registry import CANDIDATE_POINTER
+
+
+class Command(BaseCommand):
+    help = (
+        "Point the served (CURRENT) or shadow (CANDIDATE) model at a trained version. "
+        "Workers pick the change up within MODEL_REGISTRY_CHECK_INTERVAL seconds."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('version', nargs='?', help="Version directory name, e.g. lr-20250101020000")
+        parser.add_argument('--candidate', action='store_true', help="Set the shadow candidate instead")
+        parser.add_argument('--clear-candidate', action='store_true', help="Stop shadow scoring")
+        parser.add_argument('--promote', action='store_true', help="Serve the current candidate")
+    
+    def handle(self, *args, **options):
+        if options['clear_candidate']:
+            (artifact_dir() / CANDIDATE_POINTER).unlink(missing_ok=True)
+            self.stdout.write("Cleared shadow candidate")
+            return
+        
+        if options['promote']:
+            version = read_pointer(CANDIDATE_POINTER)
+            if not version:
+                raise CommandError("No candidate to promote")
+            write_pointer(version, CURRENT_POINTER)
+            (artifact_dir() / CANDIDATE_POINTER).unlink(missing_ok=True)
+            self.stdout.write(f"Promoted {version} to {CURRENT_POINTER}")
+            return
+        
+        version = options['version']
+        if not version:
+            raise CommandError("A version is required")
+        if not (artifact_dir() / version / 'schema.json').exists():
+            raise CommandError(f"No model artifacts for {version} in {artifact_dir()}")
+        
+        pointer = CANDIDATE_POINTER if options['candidate'] else CURRENT_POINTER
+        write_pointer(version, pointer)
+        self.stdout.write(f"{pointer} -> {version}")
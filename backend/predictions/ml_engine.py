@@ -1,13 +1,51 @@
 """
 Simple ML prediction engine for migraine risk assessment.
+
+When a trained model is registered (see training.py and registry.py) its
+probability drives the risk score; the rule-based factors still explain the score and
+drive recommendations. Without a model the weighted rules score on their own.
 """
 
 import numpy as np
+from asgiref.sync import sync_to_async
+from dataclasses import fields, asdict
 from datetime import datetime, timedelta
-from django.db.models import Avg, Count
+from django.conf import settings
+from migraine_backend.concurrency import gather_queries
 from logs.models import DailyLog
 from biometrics.models import Biometrics
 from migraine.models import MigraineEvent
+from .features import (
+    WindowFeatures, log_window_aggregates, biometric_window_aggregates, load_day_sums
+)
+from . import feature_store
+from .artifacts import RISK_LEVEL_CUTOFFS
+from .registry import registry
+from .scheduling import local_date
+
+
+MODEL_VERSION = "1.0-simple"
+
+# Weighted contribution of each factor to the overall risk score
+FACTOR_WEIGHTS = {
+    'poor_sleep': 0.25,
+    'high_stress': 0.25,
+    'low_hydration': 0.15,
+    'high_hrv_variation': 0.15,
+    'weather_sensitivity': 0.05,
+    'low_activity': 0.10,
+    'irregular_patterns': 0.05
+}
+
+FACTOR_LABELS = {
+    'poor_sleep': 'Insufficient Sleep',
+    'high_stress': 'High Stress Level',
+    'low_hydration': 'Low Water Intake',
+    'high_hrv_variation': 'Irregular Heart Rate',
+    'weather_sensitivity': 'Weather Changes',
+    'low_activity': 'Low Physical Activity',
+    'irregular_patterns': 'Irregular Sleep/Wake Pattern'
+}
 
 
 class MigrainePredictionEngine:
@@ -15,7 +53,8 @@ class MigrainePredictionEngine:
     
     def __init__(self, user):
         self.user = user
-        self.model_version = "1.0-simple"
+        self.model = registry.active()
+        self.model_version = self.model.version if self.model else MODEL_VERSION
     
     def predict_risk(self, target_date=None):
         """
@@ -23,35 +62,90 @@ class MigrainePredictionEngine:
         Returns: dict with risk_score, risk_level, top_factors, confidence, recommendations
         """
         if target_date is None:
-            target_date = datetime.now().date()
+            target_date = local_date(self.user.timezone)
+        
+        features = self.extract_features(target_date)
+        prediction = self.predict_from_features(features)
+        self._shadow([features], [prediction])
+        return prediction
+    
+    def extract_features(self, target_date):
+        """
+        Aggregate the 7 days preceding target_date into a WindowFeatures.
+        Reads two DailyFeature rows when the feature store has the user, else
+        issues exactly one aggregate query per table.
+        """
+        lookback_date = target_date - timedelta(days=7)
+        
+        if settings.FEATURE_STORE_ENABLED:
+            features = feature_store.window_features(self.user.id, lookback_date, target_date)
+            if features is not None:
+                return features
+        
+        log_stats = self._log_stats(lookback_date, target_date)
+        biometric_stats = self._biometric_stats(lookback_date, target_date)
+        return WindowFeatures(**log_stats, **biometric_stats)
+    
+    async def apredict_risk(self, target_date=None):
+        """Async predict_risk; the two window aggregates run concurrently."""
+        if target_date is None:
+            target_date = local_date(self.user.timezone)
         
-        # Collect recent data (last 7 days)
+        features = await self.aextract_features(target_date)
+        prediction = self.predict_from_features(features)
+        self._shadow([features], [prediction])
+        return prediction
+    
+    async def aextract_features(self, target_date):
+        """Async extract_features."""
         lookback_date = target_date - timedelta(days=7)
         
+        if settings.FEATURE_STORE_ENABLED:
+            features = await sync_to_async(feature_store.window_features)(self.user.id, lookback_date, target_date)
+            if features is not None:
+                return features
+        
+        log_stats, biometric_stats = await gather_queries(
+            lambda: self._log_stats(lookback_date, target_date),
+            lambda: self._biometric_stats(lookback_date, target_date)
+        )
+        return WindowFeatures(**log_stats, **biometric_stats)
+    
+    def _log_stats(self, lookback_date, target_date):
         # Get recent logs
-        recent_logs = DailyLog.objects.filter(
+        return DailyLog.objects.filter(
             user=self.user,
             date__gte=lookback_date,
             date__lt=target_date
-        )
-        
+        ).aggregate(**log_window_aggregates())
+    
+    def _biometric_stats(self, lookback_date, target_date):
         # Get recent biometrics
-        recent_biometrics = Biometrics.objects.filter(
+        return Biometrics.objects.filter(
             user=self.user,
             timestamp__gte=lookback_date,
             timestamp__lt=target_date
-        )
-        
+        ).aggregate(**biometric_window_aggregates())
+    
+    def predict_from_features(self, features):
+        """
+        Score a WindowFeatures into the prediction payload.
+        Not shadow-scored: callers hand the candidate all their windows at once.
+        """
         # Calculate risk factors
-        factors = self._calculate_risk_factors(recent_logs, recent_biometrics)
+        factors = self._calculate_risk_factors(features)
         
         # Calculate overall risk score (0-100)
-        risk_score = self._calculate_risk_score(factors)
+        if self.model:
+            risk_score = float(self.model.risk_scores(asdict(features))[0])
+        else:
+            risk_score = self._calculate_risk_score(factors)
         
         # Determine risk level
-        if risk_score < 30:
+        low_cutoff, high_cutoff = RISK_LEVEL_CUTOFFS
+        if risk_score < low_cutoff:
             risk_level = 'low'
-        elif risk_score < 70:
+        elif risk_score < high_cutoff:
             risk_level = 'moderate'
         else:
             risk_level = 'high'
@@ -60,7 +154,7 @@ class MigrainePredictionEngine:
         top_factors = self._get_top_factors(factors)
         
         # Calculate confidence based on data availability
-        confidence = self._calculate_confidence(recent_logs, recent_biometrics)
+        confidence = self._calculate_confidence(features)
         
         # Generate recommendations
         recommendations = self._generate_recommendations(factors, risk_level)
@@ -74,7 +168,16 @@ class MigrainePredictionEngine:
             'model_version': self.model_version
         }
     
-    def _calculate_risk_factors(self, logs, biometrics):
+    def _shadow(self, windows, predictions):
+        """Shadow-score the windows behind served predictions in one candidate call."""
+        columns = {
+            field.name: np.array([getattr(window, field.name) for window in windows], dtype=float)
+            for field in fields(WindowFeatures)
+        }
+        registry.shadow(columns, [prediction['risk_score'] for prediction in predictions],
+                        {'user_id': self.user.id})
+    
+    def _calculate_risk_factors(self, features):
         """Calculate individual risk factors."""
         factors = {
             'poor_sleep': 0,
@@ -86,43 +189,41 @@ class MigrainePredictionEngine:
             'irregular_patterns': 0
         }
         
-        if not logs.exists():
+        if not features.log_count:
             return factors
         
         # Sleep analysis
-        avg_sleep = logs.aggregate(Avg('sleep_hours'))['sleep_hours__avg'] or 7
+        avg_sleep = features.avg_sleep or 7
         if avg_sleep < 6:
             factors['poor_sleep'] = 40
         elif avg_sleep < 7:
             factors['poor_sleep'] = 25
         
         # Stress analysis
-        avg_stress = logs.aggregate(Avg('stress_level'))['stress_level__avg'] or 5
+        avg_stress = features.avg_stress or 5
         if avg_stress > 7:
             factors['high_stress'] = 45
         elif avg_stress > 5:
             factors['high_stress'] = 25
         
         # Hydration analysis
-        avg_water = logs.aggregate(Avg('water_intake'))['water_intake__avg'] or 6
+        avg_water = features.avg_water or 6
         if avg_water < 4:
             factors['low_hydration'] = 30
         elif avg_water < 6:
             factors['low_hydration'] = 15
         
         # Activity analysis
-        avg_exercise = logs.aggregate(Avg('exercise_duration'))['exercise_duration__avg'] or 0
+        avg_exercise = features.avg_exercise or 0
         if avg_exercise < 15:
             factors['low_activity'] = 20
         
         # HRV analysis (if available)
-        if biometrics.exists():
-            avg_hrv = biometrics.aggregate(Avg('hrv'))['hrv__avg']
-            if avg_hrv and avg_hrv < 30:
-                factors['high_hrv_variation'] = 35
+        if features.avg_hrv and features.avg_hrv < 30:
+            factors['high_hrv_variation'] = 35
         
         # Pattern irregularity (check consistency)
-        if logs.count() < 5:  # Less than 5 days of data
+        if features.log_count < 5:  # Less than 5 days of data
             factors['irregular_patterns'] = 20
         
         return factors
@@ -130,55 +231,34 @@ class MigrainePredictionEngine:
     def _calculate_risk_score(self, factors):
         """Calculate overall risk score from individual factors."""
         # Weighted sum of factors
-        weights = {
-            'poor_sleep': 0.25,
-            'high_stress': 0.25,
-            'low_hydration': 0.15,
-            'high_hrv_variation': 0.15,
-            'weather_sensitivity': 0.05,
-            'low_activity': 0.10,
-            'irregular_patterns': 0.05
-        }
-        
-        risk_score = sum(factors[k] * weights[k] for k in factors)
+        risk_score = sum(factors[k] * FACTOR_WEIGHTS[k] for k in factors)
         return min(100, max(0, risk_score))
     
-    def _get_top_factors(self, factors):
+    @staticmethod
+    def _get_top_factors(factors):
         """Get top 3 contributing factors."""
         sorted_factors = sorted(factors.items(), key=lambda x: x[1], reverse=True)
         
-        factor_labels = {
-            'poor_sleep': 'Insufficient Sleep',
-            'high_stress': 'High Stress Level',
-            'low_hydration': 'Low Water Intake',
-            'high_hrv_variation': 'Irregular Heart Rate',
-            'weather_sensitivity': 'Weather Changes',
-            'low_activity': 'Low Physical Activity',
-            'irregular_patterns': 'Irregular Sleep/Wake Pattern'
-        }
-        
         top_factors = []
         for factor, score in sorted_factors[:3]:
             if score > 5:  # Only include significant factors
                 top_factors.append({
-                    'factor': factor_labels.get(factor, factor),
+                    'factor': FACTOR_LABELS.get(factor, factor),
                     'impact': int(score)
                 })
         
         return top_factors
     
-    def _calculate_confidence(self, logs, biometrics):
+    def _calculate_confidence(self, features):
         """Calculate prediction confidence based on data availability."""
-        log_count = logs.count()
-        bio_count = biometrics.count()
-        
         # More data = higher confidence
-        log_confidence = min(100, (log_count / 7) * 70)  # Max 70% from logs
-        bio_confidence = min(30, (bio_count / 7) * 30)  # Max 30% from biometrics
+        log_confidence = min(100, (features.log_count / 7) * 70)  # Max 70% from logs
+        bio_confidence = min(30, (features.bio_count / 7) * 30)  # Max 30% from biometrics
         
         return log_confidence + bio_confidence
     
-    def _generate_recommendations(self, factors, risk_level):
+    @staticmethod
+    def _generate_recommendations(factors, risk_level):
         """Generate personalized recommendations."""
         recommendations = []
         
@@ -203,15 +283,177 @@ class MigrainePredictionEngine:
         
         return recommendations[:5]  # Return max 5 recommendations
     
-    def predict_next_7_days(self):
-        """Generate predictions for the next 7 days."""
-        today = datetime.now().date()
+    def predict_next_7_days(self, daily=None, first_date=None):
+        """Generate predictions for the next 7 days, from the user's local today by default."""
+        today = first_date or local_date(self.user.timezone)
+        windows = []
         predictions = []
         
-        for i in range(7):
-            target_date = today + timedelta(days=i)
-            prediction = self.predict_risk(target_date)
+        for target_date, features in self.extract_rolling_features(today, days=7, daily=daily):
+            prediction = self.predict_from_features(features)
             prediction['date'] = target_date.isoformat()
+            windows.append(features)
             predictions.append(prediction)
         
+        self._shadow(windows, predictions)
         return predictions
+    
+    def extract_rolling_features(self, first_date, days, daily=None):
+        """
+        Yield (target_date, WindowFeatures) for `days` consecutive target dates.
+        
+        The whole span is fetched once as per-day sums and counts, and each
+        7-day window is derived from the previous one by adding the day that
+        enters and subtracting the day that leaves. Pass `daily` ({date: sums}
+        covering the span) to reuse sums that were already loaded.
+        """
+        span_start = first_date - timedelta(days=7)
+        span_end = first_date + timedelta(days=days - 1)
+        
+        if daily is None:
+            daily = load_day_sums([self.user.id], span_start, span_end).get(self.user.id, {})
+        
+        totals = {}
+        
+        def shift(day, sign):
+            for name, value in daily.get(day, {}).items():
+                if value is not None:
+                    totals[name] = totals.get(name, 0) + sign * value
+        
+        for offset in range(7):
+            shift(span_start + timedelta(days=offset), 1)
+        
+        for i in range(days):
+            target_date = first_date + timedelta(days=i)
+            if i:
+                shift(target_date - timedelta(days=1), 1)
+                shift(target_date - timedelta(days=8), -1)
+            
+            yield target_date, WindowFeatures.from_sums(totals)
+
+
+class BatchPredictionEngine:
+    """
+    Vectorized variant of MigrainePredictionEngine for scoring many users at once.
+    
+    The 7-day windows for all users are pulled with one grouped query per
+    table, turned into NumPy feature arrays and scored in a single pass using
+    the same thresholds and weights as the per-user engine.
+    """
+    
+    def __init__(self, target_date=None):
+        self.target_date = target_date or datetime.now().date()
+        self.model = registry.active()
+        self.model_version = self.model.version if self.model else MODEL_VERSION
+    
+    def predict_many(self, user_ids):
+        """
+        Predict migraine risk for every user in user_ids.
+        Returns: dict mapping user_id to the same payload as predict_risk
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        
+        features = self._load_features(user_ids)
+        factors = self._calculate_risk_factors(features)
+        
+        if self.model:
+            risk_scores = self.model.risk_scores(features)
+        else:
+            # Accumulate in the same order as the per-user engine so the
+            # floating point results are identical
+            risk_scores = np.zeros(len(user_ids))
+            for i, name in enumerate(FACTOR_WEIGHTS):
+                risk_scores = risk_scores + factors[:, i] * FACTOR_WEIGHTS[name]
+            risk_scores = np.clip(risk_scores, 0, 100)
+        registry.shadow(features, risk_scores, {'target_date': self.target_date.isoformat()})
+        
+        risk_levels = np.select(
+            [risk_scores < RISK_LEVEL_CUTOFFS[0], risk_scores < RISK_LEVEL_CUTOFFS[1]],
+            ['low', 'moderate'],
+            'high'
+        )
+        confidences = self._calculate_confidence(features)
+        
+        results = {}
+        for i, user_id in enumerate(user_ids):
+            row = dict(zip(FACTOR_WEIGHTS, factors[i].tolist()))
+            risk_level = str(risk_levels[i])
+            results[user_id] = {
+                'risk_score': int(risk_scores[i]),
+                'risk_level': risk_level,
+                'top_factors': MigrainePredictionEngine._get_top_factors(row),
+                'confidence': round(float(confidences[i]), 2),
+                'recommendations': MigrainePredictionEngine._generate_recommendations(row, risk_level),
+                'model_version': self.model_version
+            }
+        
+        return results
+    
+    def _load_features(self, user_ids):
+        """Load per-user window aggregates into NumPy arrays aligned with user_ids."""
+        lookback_date = self.target_date - timedelta(days=7)
+        index = {user_id: i for i, user_id in enumerate(user_ids)}
+        size = len(user_ids)
+        
+        # Missing averages are NaN, missing counts are zero
+        features = {
+            field.name: np.full(size, np.nan if field.default is None else field.default, dtype=float)
+            for field in fields(WindowFeatures)
+        }
+        
+        log_rows = DailyLog.objects.filter(
+            user_id__in=user_ids,
+            date__gte=lookback_date,
+            date__lt=self.target_date
+        ).order_by().values('user_id').annotate(**log_window_aggregates())
+        
+        biometric_rows = Biometrics.objects.filter(
+            user_id__in=user_ids,
+            timestamp__gte=lookback_date,
+            timestamp__lt=self.target_date
+        ).order_by().values('user_id').annotate(**biometric_window_aggregates())
+        
+        for row in list(log_rows) + list(biometric_rows):
+            i = index[row.pop('user_id')]
+            for name, value in row.items():
+                if value is not None:
+                    features[name][i] = value
+        
+        return features
+    
+    def _calculate_risk_factors(self, features):
+        """Calculate the factor matrix (users x factors) from feature arrays."""
+        def with_default(values, default):
+            # Mirrors `aggregate(...) or default` in the per-user engine
+            return np.where(np.isnan(values) | (values == 0), default, values)
+        
+        avg_sleep = with_default(features['avg_sleep'], 7)
+        avg_stress = with_default(features['avg_stress'], 5)
+        avg_water = with_default(features['avg_water'], 6)
+        avg_exercise = with_default(features['avg_exercise'], 0)
+        avg_hrv = with_default(features['avg_hrv'], 0)
+        log_count = features['log_count']
+        
+        columns = {
+            'poor_sleep': np.select([avg_sleep < 6, avg_sleep < 7], [40, 25], 0),
+            'high_stress': np.select([avg_stress > 7, avg_stress > 5], [45, 25], 0),
+            'low_hydration': np.select([avg_water < 4, avg_water < 6], [30, 15], 0),
+            'high_hrv_variation': np.where((avg_hrv > 0) & (avg_hrv < 30), 35, 0),
+            'weather_sensitivity': np.zeros(len(log_count)),
+            'low_activity': np.where(avg_exercise < 15, 20, 0),
+            'irregular_patterns': np.where(log_count < 5, 20, 0),
+        }
+        
+        factors = np.column_stack([columns[name] for name in FACTOR_WEIGHTS]).astype(float)
+        
+        # Users without any logs in the window get no risk factors at all
+        factors[log_count == 0] = 0
+        return factors
+    
+    def _calculate_confidence(self, features):
+        """Calculate prediction confidence for every user from window counts."""
+        log_confidence = np.minimum(100, (features['log_count'] / 7) * 70)
+        bio_confidence = np.minimum(30, (features['bio_count'] / 7) * 30)
+        return log_confidence + bio_confidence
@@ -52,3 +52,97 @@ class Prediction(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.date} ({self.risk_level})"
+
+
+class PredictionChunk(models.Model):
+    """Completion record for one user ID range of a daily prediction run."""
+    
+    date = models.DateField()
+    first_user_id = models.BigIntegerField()
+    last_user_id = models.BigIntegerField()
+    
+    users_scored = models.IntegerField(default=0)
+    users_failed = models.IntegerField(default=0)
+    duration_seconds = models.FloatField(default=0)
+    
+    completed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'prediction_chunks'
+        ordering = ['-date', 'first_user_id']
+        unique_together = ['date', 'first_user_id', 'last_user_id']
+    
+    def __str__(self):
+        return f"{self.date} users {self.first_user_id}-{self.last_user_id}"
+
+
+class DailyFeature(models.Model):
+    """
+    Per-user per-day rollup of DailyLog and Biometrics inputs (the feature store).
+    
+    The daily columns hold that day's sums and non-null counts. The cum_* columns
+    hold running totals over all of the user's days up to and including this one,
+    so the sums for any window (7, 30, 60 days...) are the difference of two rows.
+    Maintained by predictions.feature_store.
+    """
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_features')
+    date = models.DateField()
+    
+    # Daily log values
+    log_count = models.IntegerField(default=0)
+    sleep_sum = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    sleep_count = models.IntegerField(default=0)
+    stress_sum = models.IntegerField(default=0)
+    stress_count = models.IntegerField(default=0)
+    water_sum = models.IntegerField(default=0)
+    water_count = models.IntegerField(default=0)
+    exercise_sum = models.IntegerField(default=0)
+    exercise_count = models.IntegerField(default=0)
+    
+    # Daily biometrics
+    bio_count = models.IntegerField(default=0, help_text="Biometric samples recorded")
+    hrv_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    hrv_count = models.IntegerField(default=0)
+    hrv_mean = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    
+    # Running totals through this day
+    cum_log_count = models.BigIntegerField(default=0)
+    cum_sleep_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cum_sleep_count = models.BigIntegerField(default=0)
+    cum_stress_sum = models.BigIntegerField(default=0)
+    cum_stress_count = models.BigIntegerField(default=0)
+    cum_water_sum = models.BigIntegerField(default=0)
+    cum_water_count = models.BigIntegerField(default=0)
+    cum_exercise_sum = models.BigIntegerField(default=0)
+    cum_exercise_count = models.BigIntegerField(default=0)
+    cum_bio_count = models.BigIntegerField(default=0)
+    cum_hrv_sum = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    cum_hrv_count = models.BigIntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'daily_features'
+        ordering = ['-date']
+        unique_together = ['user', 'date']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.date}"
+
+
+class FeatureCoverage(models.Model):
+    """
+    Marks a user whose DailyFeature rows cover their whole history: written by
+    the backfill, or at signup when there is no history yet. The store is only
+    read and maintained for covered users.
+    """
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='feature_coverage')
+    covered_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'feature_coverage'
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.covered_at}"
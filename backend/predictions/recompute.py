@@ -0,0 +1,30 @@
+"""
+Debounced prediction recompute after writes to a user's inputs.
+
+The first DailyLog, Biometrics or MigraineEvent write of a burst claims a
+per-user slot once its transaction commits (migraine_backend.debounce) and
+enqueues generate_user_prediction PREDICTION_RECOMPUTE_DELAY seconds later,
+for the user's local today. Writes that find the slot taken are coalesced
+into that run, which reads all of them; the run releases the slot before
+computing, so a write landing mid-run schedules the next one. At most one
+recompute per user per delay, however many rows a sync writes.
+"""
+
+from django.conf import settings
+
+from migraine_backend import debounce
+
+
+def schedule(user_id):
+    """Queue a recompute of today's prediction unless one is already pending."""
+    if settings.PREDICTION_RECOMPUTE_DELAY <= 0:
+        return
+    
+    from .tasks import generate_user_prediction
+    debounce.schedule(generate_user_prediction, user_id, settings.PREDICTION_RECOMPUTE_DELAY)
+
+
+def release(user_id):
+    """Let the next write schedule a new recompute."""
+    from .tasks import generate_user_prediction
+    debounce.release(generate_user_prediction, user_id)
@@ -0,0 +1,144 @@
+"""
+In-process model registry.
+
+Every worker process holds the served model (named by the CURRENT pointer) and
+optionally a shadow candidate (named by CANDIDATE). Pointers are re-read at
+most once per MODEL_REGISTRY_CHECK_INTERVAL seconds, never per request; when a
+pointer changes the new version is loaded and swapped in with a single
+reference assignment, so in-flight requests keep the model they started with.
+
+Shadow scoring runs the candidate on the same features in a background thread
+and logs its output and latency next to the served result. Callers submit once
+per request or batch; at most MODEL_SHADOW_QUEUE_SIZE submissions wait or run
+at a time, and further ones are dropped (and counted) rather than queued, so a
+slow candidate can't build an unbounded backlog. Shadow output is never
+returned to clients.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+
+from .artifacts import RiskModel, artifact_dir, read_pointer, CURRENT_POINTER
+
+CANDIDATE_POINTER = 'CANDIDATE'
+
+logger = logging.getLogger(__name__)
+shadow_logger = logging.getLogger('predictions.shadow')
+
+
+class ModelRegistry:
+    """Holds the served and shadow models for this process."""
+    
+    def __init__(self):
+        self._models = {CURRENT_POINTER: None, CANDIDATE_POINTER: None}
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._executor = None
+        self._shadow_slots = threading.BoundedSemaphore(settings.MODEL_SHADOW_QUEUE_SIZE)
+        self.shadow_dropped = 0
+    
+    def active(self):
+        """The model to serve, or None to fall back to the rule-based score."""
+        self._refresh_if_due()
+        return self._models[CURRENT_POINTER]
+    
+    def candidate(self):
+        """The shadow candidate model, or None."""
+        self._refresh_if_due()
+        return self._models[CANDIDATE_POINTER]
+    
+    def refresh(self):
+        """Re-read the pointers now and swap in any changed versions."""
+        with self._lock:
+            for pointer in (CURRENT_POINTER, CANDIDATE_POINTER):
+                version = read_pointer(pointer)
+                loaded = self._models[pointer]
+                if (loaded.version if loaded else None) == version:
+                    continue
+                
+                try:
+                    model = RiskModel.load(artifact_dir() / version) if version else None
+                except (OSError, ValueError, KeyError):
+                    logger.exception("Could not load model %s for %s; keeping %s",
+                                     version, pointer, loaded and loaded.version)
+                    continue
+                
+                self._models[pointer] = model
+                logger.info("Model registry %s -> %s", pointer, version)
+            
+            self._checked_at = time.monotonic()
+    
+    def shadow(self, columns, served_scores, context=None):
+        """
+        Score columns with the candidate in the background and log the comparison.
+        served_scores: risk scores (scalar or array) that were actually served.
+        """
+        candidate = self.candidate()
+        if candidate is None or not settings.MODEL_SHADOW_ENABLED:
+            return None
+        
+        if not self._shadow_slots.acquire(blocking=False):
+            self.shadow_dropped += 1
+            return None
+        
+        served_version = self._models[CURRENT_POINTER]
+        served_version = served_version.version if served_version else 'rules'
+        try:
+            future = self._get_executor().submit(
+                self._score_shadow, candidate, columns, served_scores, served_version, context or {}
+            )
+        except RuntimeError:
+            # Executor shut down at interpreter exit
+            self._shadow_slots.release()
+            return None
+        future.add_done_callback(lambda _: self._shadow_slots.release())
+        return future
+    
+    def _score_shadow(self, candidate, columns, served_scores, served_version, context):
+        try:
+            started = time.perf_counter()
+            shadow_scores = candidate.risk_scores(columns)
+            latency_ms = (time.perf_counter() - started) * 1000
+        except Exception:
+            shadow_logger.exception("Shadow scoring failed for %s", candidate.version)
+            return None
+        
+        served = [float(score) for score in _as_list(served_scores)]
+        shadow = [round(float(score), 2) for score in shadow_scores]
+        shadow_logger.info(
+            "shadow served=%s candidate=%s rows=%s latency_ms=%.3f mean_abs_diff=%.3f dropped=%s context=%s%s",
+            served_version,
+            candidate.version,
+            len(shadow),
+            latency_ms,
+            sum(abs(a - b) for a, b in zip(served, shadow)) / len(shadow) if shadow else 0,
+            self.shadow_dropped,
+            context,
+            f" served_scores={served} shadow_scores={shadow}" if len(shadow) == 1 else ''
+        )
+        return shadow
+    
+    def _refresh_if_due(self):
+        checked_at = self._checked_at
+        if checked_at is None or time.monotonic() - checked_at >= settings.MODEL_REGISTRY_CHECK_INTERVAL:
+            self.refresh()
+    
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shadow-scoring')
+        return self._executor
+
+
+def _as_list(values):
+    try:
+        return list(values)
+    except TypeError:
+        return [values]
+
+
+registry = ModelRegistry()
@@ -0,0 +1,70 @@
+"""
+Timezone-aware scheduling for daily predictions.
+
+Users are bucketed by their profile timezone. The hourly beat task scores each
+bucket when it reaches PREDICTION_LOCAL_HOUR local time, so the daily load is
+spread across the UTC day and every user is scored shortly before their own
+morning with yesterday's data complete.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+
+User = get_user_model()
+
+
+def get_zone(name):
+    """Resolve a profile timezone name, falling back to UTC for unknown values."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return dt_timezone.utc
+
+
+def local_date(name, now=None):
+    """The current date in a profile timezone, as the daily run scores it."""
+    now = now or datetime.now(dt_timezone.utc)
+    return now.astimezone(get_zone(name)).date()
+
+
+def active_timezones():
+    """Return {timezone name: active user count} in a single grouped query."""
+    rows = User.objects.filter(is_active=True).order_by().values('timezone').annotate(users=Count('id'))
+    return {row['timezone']: row['users'] for row in rows}
+
+
+def zones_due(now=None, local_hour=None):
+    """
+    Return {local date: [timezone names]} for zones whose local hour is local_hour.
+    Zones due in the same run can be on different local dates across the date line.
+    """
+    now = now or datetime.now(dt_timezone.utc)
+    local_hour = settings.PREDICTION_LOCAL_HOUR if local_hour is None else local_hour
+    
+    due = defaultdict(list)
+    for name in active_timezones():
+        local_now = now.astimezone(get_zone(name))
+        if local_now.hour == local_hour:
+            due[local_now.date()].append(name)
+    
+    return dict(due)
+
+
+def load_histogram(day=None, local_hour=None):
+    """Return {UTC hour: user count} scheduled for the given UTC day."""
+    day = day or datetime.now(dt_timezone.utc).date()
+    local_hour = settings.PREDICTION_LOCAL_HOUR if local_hour is None else local_hour
+    counts = active_timezones()
+    
+    histogram = {hour: 0 for hour in range(24)}
+    for hour in range(24):
+        run_at = datetime(day.year, day.month, day.day, hour, tzinfo=dt_timezone.utc)
+        for name, users in counts.items():
+            if run_at.astimezone(get_zone(name)).hour == local_hour:
+                histogram[hour] += users
+    
+    return histogram
@@ -0,0 +1,109 @@
+"""
+Signal handlers keeping cached predictions and the feature store in sync with
+their inputs.
+"""
+
+from datetime import datetime
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from logs.models import DailyLog
+from biometrics.models import Biometrics
+from migraine.models import MigraineEvent
+from migraine_backend import versions
+from .models import Prediction, FeatureCoverage
+from . import cache as prediction_cache
+from . import feature_store
+from . import recompute
+
+User = get_user_model()
+
+# Column deciding which feature store day a row belongs to
+FEATURE_DAY_FIELDS = {DailyLog: 'date', Biometrics: 'timestamp'}
+
+
+@receiver(post_save, sender=DailyLog)
+@receiver(post_delete, sender=DailyLog)
+@receiver(post_save, sender=Biometrics)
+@receiver(post_delete, sender=Biometrics)
+@receiver(post_save, sender=MigraineEvent)
+@receiver(post_delete, sender=MigraineEvent)
+def invalidate_prediction_cache(sender, instance, **kwargs):
+    """Drop cached predictions for the user whose data changed."""
+    prediction_cache.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=DailyLog)
+@receiver(post_delete, sender=DailyLog)
+@receiver(post_save, sender=Biometrics)
+@receiver(post_delete, sender=Biometrics)
+@receiver(post_save, sender=MigraineEvent)
+@receiver(post_delete, sender=MigraineEvent)
+def schedule_prediction_recompute(sender, instance, raw=False, **kwargs):
+    """Refresh today's stored prediction shortly after its inputs change."""
+    if raw:
+        return
+    
+    recompute.schedule(instance.user_id)
+
+
+@receiver(post_save, sender=DailyLog)
+@receiver(post_delete, sender=DailyLog)
+@receiver(post_save, sender=Biometrics)
+@receiver(post_delete, sender=Biometrics)
+@receiver(post_save, sender=MigraineEvent)
+@receiver(post_delete, sender=MigraineEvent)
+@receiver(post_save, sender=Prediction)
+@receiver(post_delete, sender=Prediction)
+def bump_data_version(sender, instance, **kwargs):
+    """Invalidate conditional GET validators covering the changed table."""
+    versions.bump(instance.user_id, sender)
+
+
+@receiver(pre_save, sender=DailyLog)
+@receiver(pre_save, sender=Biometrics)
+def remember_previous_day(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Record the day an existing row is moving away from, if any."""
+    if raw or instance.pk is None or not settings.FEATURE_STORE_ENABLED:
+        return
+    
+    field = FEATURE_DAY_FIELDS[sender]
+    if update_fields is not None and field not in update_fields:
+        return
+    
+    previous = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    instance._feature_previous_day = _to_day(previous) if previous else None
+
+
+@receiver(post_save, sender=DailyLog)
+@receiver(post_delete, sender=DailyLog)
+@receiver(post_save, sender=Biometrics)
+@receiver(post_delete, sender=Biometrics)
+def refresh_feature_store(sender, instance, raw=False, **kwargs):
+    """Re-roll the feature store for the day(s) the row touched, once per user per transaction."""
+    if raw or not settings.FEATURE_STORE_ENABLED:
+        return
+    
+    days = {
+        _to_day(getattr(instance, FEATURE_DAY_FIELDS[sender])),
+        getattr(instance, '_feature_previous_day', None)
+    }
+    feature_store.refresh_days_on_commit(instance.user_id, [day for day in days if day])
+
+
+@receiver(post_save, sender=User)
+def cover_new_user(sender, instance, created=False, raw=False, **kwargs):
+    """A new user has no history, so the feature store covers them from the start."""
+    if created and not raw:
+        FeatureCoverage.objects.get_or_create(user=instance)
+
+
+def _to_day(value):
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+    return value
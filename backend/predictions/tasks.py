@@ -1,69 +1,244 @@
-from celery import shared_task
+import logging
+import time
+from celery import shared_task, chord, group
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from datetime import datetime
-from .ml_engine import MigrainePredictionEngine
-from .models import Prediction
+from migraine_backend import versions
+from .ml_engine import MigrainePredictionEngine, BatchPredictionEngine
+from .models import Prediction, PredictionChunk
+from .scheduling import local_date, zones_due
+from .serializers import PredictionSerializer
+from .training import train_model
+from . import cache as prediction_cache
+from . import feature_store
+from . import recompute
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+PREDICTION_RESULT_FIELDS = [
+    'risk_score', 'risk_level', 'top_factors', 'confidence',
+    'model_version', 'recommendations'
+]
 
 
 @shared_task
-def generate_daily_predictions():
-    """Generate daily predictions for all active users."""
-    today = datetime.now().date()
-    users = User.objects.filter(is_active=True)
+def schedule_local_morning_predictions():
+    """
+    Hourly: score users whose local time has reached PREDICTION_LOCAL_HOUR.
+    Each user is scored for their own local date.
+    """
+    dispatched = []
+    for local_date, timezones in zones_due().items():
+        generate_daily_predictions.delay(local_date.isoformat(), timezones)
+        dispatched.append(f"{local_date} ({len(timezones)} timezones)")
     
-    predictions_created = 0
-    for user in users:
-        engine = MigrainePredictionEngine(user)
-        result = engine.predict_risk(today)
+    return f"Scheduled predictions for {', '.join(dispatched) or 'no timezones'}"
+
+
+@shared_task
+def generate_daily_predictions(target_date=None, timezones=None):
+    """
+    Generate daily predictions for all active users, or only those in timezones.
+    
+    Active users are split into contiguous ID ranges of PREDICTION_CHUNK_SIZE
+    users and scored by a chord of generate_prediction_chunk tasks, so the work
+    spreads across all workers. Chunks already completed for the date are
+    skipped, which makes re-running the task resume an interrupted run.
+    """
+    target_date = _parse_date(target_date)
+    user_ids = _active_users(timezones).order_by('id').values_list('id', flat=True)
+    
+    chunks = _chunk_id_ranges(user_ids, settings.PREDICTION_CHUNK_SIZE)
+    completed = set(
+        PredictionChunk.objects.filter(date=target_date)
+        .values_list('first_user_id', 'last_user_id')
+    )
+    pending = [chunk for chunk in chunks if chunk not in completed]
+    
+    if not pending:
+        return f"All {len(chunks)} chunks already completed for {target_date}"
+    
+    header = group(
+        generate_prediction_chunk.s(target_date.isoformat(), first_user_id, last_user_id, timezones)
+        for first_user_id, last_user_id in pending
+    )
+    chord(header)(summarize_prediction_run.s(target_date.isoformat()))
+    
+    return f"Dispatched {len(pending)} of {len(chunks)} chunks for {target_date}"
+
+
+@shared_task
+def generate_prediction_chunk(target_date, first_user_id, last_user_id, timezones=None):
+    """Score one ID range of active users and commit the results in a single transaction."""
+    target_date = _parse_date(target_date)
+    started = time.monotonic()
+    
+    user_ids = list(
+        _active_users(timezones).filter(
+            id__gte=first_user_id,
+            id__lte=last_user_id
+        ).order_by('id').values_list('id', flat=True)
+    )
+    
+    # Scored outside the write transaction: a database error in the batch path
+    # would otherwise abort it for the fallback and the writes below
+    try:
+        results = BatchPredictionEngine(target_date).predict_many(user_ids)
+        failed = 0
+    except Exception:
+        logger.exception("Batch scoring failed for users %s-%s, scoring individually",
+                         first_user_id, last_user_id)
+        results, failed = _predict_individually(target_date, user_ids)
+    
+    with transaction.atomic():
+        _save_predictions(target_date, results)
         
-        # Create or update prediction
-        prediction, created = Prediction.objects.update_or_create(
-            user=user,
-            date=today,
+        duration = time.monotonic() - started
+        PredictionChunk.objects.update_or_create(
+            date=target_date,
+            first_user_id=first_user_id,
+            last_user_id=last_user_id,
             defaults={
-                'risk_score': result['risk_score'],
-                'risk_level': result['risk_level'],
-                'top_factors': result['top_factors'],
-                'confidence': result['confidence'],
-                'model_version': result['model_version'],
-                'recommendations': result['recommendations']
+                'users_scored': len(results),
+                'users_failed': failed,
+                'duration_seconds': duration
             }
         )
-        
-        if created:
-            predictions_created += 1
     
-    return f"Generated {predictions_created} predictions for {users.count()} users"
+    return {
+        'first_user_id': first_user_id,
+        'last_user_id': last_user_id,
+        'users_scored': len(results),
+        'users_failed': failed,
+        'duration_seconds': round(duration, 3)
+    }
+
+
+@shared_task
+def summarize_prediction_run(chunk_results, target_date):
+    """Chord callback: summarize every completed chunk for the date."""
+    target_date = _parse_date(target_date)
+    chunks = PredictionChunk.objects.filter(date=target_date).order_by('first_user_id')
+    
+    summary = {
+        'date': target_date.isoformat(),
+        'chunks': chunks.count(),
+        'chunks_this_run': len(chunk_results),
+        'users_scored': sum(chunk.users_scored for chunk in chunks),
+        'users_failed': sum(chunk.users_failed for chunk in chunks),
+        'chunk_durations': {
+            f"{chunk.first_user_id}-{chunk.last_user_id}": chunk.duration_seconds
+            for chunk in chunks
+        }
+    }
+    
+    logger.info("Daily prediction run summary: %s", summary)
+    return summary
+
+
+def _active_users(timezones=None):
+    """Active users, optionally restricted to a list of profile timezones."""
+    users = User.objects.filter(is_active=True)
+    if timezones is not None:
+        users = users.filter(timezone__in=timezones)
+    return users
+
+
+def _chunk_id_ranges(user_ids, chunk_size):
+    """Split an ordered ID queryset into (first_id, last_id) ranges of chunk_size IDs."""
+    ranges = []
+    chunk = []
+    for user_id in user_ids.iterator(chunk_size=chunk_size):
+        chunk.append(user_id)
+        if len(chunk) == chunk_size:
+            ranges.append((chunk[0], chunk[-1]))
+            chunk = []
+    
+    if chunk:
+        ranges.append((chunk[0], chunk[-1]))
+    
+    return ranges
+
+
+def _predict_individually(target_date, user_ids):
+    """Fallback scoring one user at a time so a single bad user can't sink a chunk."""
+    results = {}
+    failed = 0
+    for user in User.objects.filter(id__in=user_ids):
+        try:
+            results[user.id] = MigrainePredictionEngine(user).predict_risk(target_date)
+        except Exception:
+            logger.exception("Prediction failed for user %s", user.id)
+            failed += 1
+    
+    return results, failed
+
+
+def _parse_date(value):
+    """Accept None, a date or an ISO string (as tasks receive them over JSON)."""
+    if value is None:
+        return datetime.now().date()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).date()
+    return value
+
+
+def _save_predictions(target_date, results):
+    """Upsert a batch of prediction results in a single statement."""
+    Prediction.objects.bulk_create(
+        [
+            Prediction(
+                user_id=user_id,
+                date=target_date,
+                **{field: result[field] for field in PREDICTION_RESULT_FIELDS}
+            )
+            for user_id, result in results.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=PREDICTION_RESULT_FIELDS,
+    )
+    user_ids = list(results)
+    transaction.on_commit(lambda: _after_save_predictions(user_ids))
+    return len(results)
+
+
+def _after_save_predictions(user_ids):
+    """Stand in for the Prediction signals bulk_create skips."""
+    # The cached today entries may hold the rows just replaced
+    prediction_cache.invalidate_users(user_ids)
+    versions.bump_many(user_ids, Prediction)
 
 
 @shared_task
 def retrain_prediction_model():
-    """
-    Placeholder for model retraining logic.
-    In a production system, this would:
-    1. Collect historical data
-    2. Train/update ML model
-    3. Validate performance
-    4. Deploy new model version
-    """
-    # TODO: Implement actual ML model training
-    return "Model retraining task completed (placeholder)"
+    """Train the risk model on historical windows and publish a new version."""
+    model = train_model()
+    if model is None:
+        return "Model retraining skipped: not enough labelled data"
+    
+    return f"Published model {model.version} ({model.metadata['train_rows']} rows, holdout {model.metadata['holdout']})"
 
 
 @shared_task
 def generate_user_prediction(user_id, target_date=None):
-    """Generate prediction for a specific user."""
+    """
+    Generate prediction for a specific user, by default for their local today
+    (the row the daily run writes for them).
+    """
+    if target_date is None:
+        # A debounced recompute: writes from here on need a run of their own
+        recompute.release(user_id)
+    
     try:
         user = User.objects.get(id=user_id)
+        target_date = _parse_date(target_date) if target_date else local_date(user.timezone)
         engine = MigrainePredictionEngine(user)
         
-        if target_date is None:
-            target_date = datetime.now().date()
-        elif isinstance(target_date, str):
-            target_date = datetime.fromisoformat(target_date).date()
-        
         result = engine.predict_risk(target_date)
         
         prediction, created = Prediction.objects.update_or_create(
@@ -78,7 +253,19 @@ def generate_user_prediction(user_id, target_date=None):
                 'recommendations': result['recommendations']
             }
         )
+        # Replace a copy of the superseded row the today action may have cached
+        prediction_cache.store(
+            user.id, 'prediction', target_date, engine.model_version,
+            dict(PredictionSerializer(prediction).data)
+        )
         
         return f"Prediction {'created' if created else 'updated'} for {user.username}"
     except User.DoesNotExist:
         return f"User {user_id} not found"
+
+
+@shared_task
+def refresh_user_features(user_id, days):
+    """Micro-batch feature store refresh for writes that bypass signals (bulk inserts)."""
+    feature_store.refresh_days(user_id, [_parse_date(day) for day in days])
+    return f"Refreshed {len(days)} feature days for user {user_id}"
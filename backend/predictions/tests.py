@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from logs.models import DailyLog
+from .registry import registry
+from .scheduling import local_date
+from .tasks import generate_user_prediction
+
+User = get_user_model()
+
+
+def _zone_off_server_date():
+    """A timezone whose date differs from the server's (UTC) date right now."""
+    # UTC+14 is a day ahead from 10:00 UTC, UTC-11 a day behind before 11:00 UTC
+    return 'Pacific/Kiritimati' if datetime.now(dt_timezone.utc).hour >= 10 else 'Pacific/Pago_Pago'
+
+
+class RecomputeTodayTests(TransactionTestCase):
+    """
+    A write is reflected in the next today response, on the user's local date.
+    Not a TestCase: the async actions read on their own connections, which
+    must see committed rows.
+    """
+    
+    def setUp(self):
+        cache.clear()
+        self.queued = []
+        # Score with the rules whatever model MODEL_ARTIFACT_DIR holds, and
+        # hold debounced recomputes until run_queued()
+        for patcher in (
+            mock.patch.object(registry, 'active', return_value=None),
+            mock.patch.object(generate_user_prediction, 'apply_async', side_effect=self.queue_recompute),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        
+        self.user = User.objects.create_user(
+            username='traveller', email='traveller@example.com', password='secret',
+            timezone=_zone_off_server_date()
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = local_date(self.user.timezone)
+        for offset in range(1, 8):
+            DailyLog.objects.create(
+                user=self.user, date=self.today - timedelta(days=offset),
+                sleep_hours=7, stress_level=5, water_intake=8, exercise_duration=30
+            )
+        self.run_queued()
+    
+    def queue_recompute(self, args, countdown=None):
+        self.queued.append(args)
+    
+    def run_queued(self):
+        # What the worker does once PREDICTION_RECOMPUTE_DELAY has passed
+        while self.queued:
+            generate_user_prediction(*self.queued.pop(0))
+    
+    def test_log_changes_next_today_response(self):
+        before = self.client.get('/api/predictions/today/').data
+        self.assertEqual(before['date'], self.today.isoformat())
+        
+        log = DailyLog.objects.get(user=self.user, date=self.today - timedelta(days=1))
+        log.sleep_hours = 2
+        log.stress_level = 9
+        log.save()
+        self.assertEqual(len(self.queued), 1)
+        self.run_queued()
+        
+        after = self.client.get('/api/predictions/today/').data
+        self.assertEqual(after['date'], self.today.isoformat())
+        self.assertGreater(after['risk_score'], before['risk_score'])
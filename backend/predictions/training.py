@@ -0,0 +1,283 @@
+"""
+Training pipeline for the migraine risk model.
+
+Every (user, day) with logged data becomes one example: the features are the
+same 7-day window aggregates the engine scores (see WindowFeatures) and the
+label is whether a MigraineEvent started on that day. Users are streamed from
+the database in ID chunks and their windows appended to on-disk matrices, so
+memory use is bounded by one chunk regardless of table size. A logistic
+regression is then fitted with Newton's method over memory-mapped blocks.
+"""
+
+import logging
+import tempfile
+import numpy as np
+from collections import defaultdict
+from dataclasses import fields
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from migraine.models import MigraineEvent
+from .artifacts import RiskModel, artifact_dir, write_pointer
+from .features import WindowFeatures, DAY_SUM_COLUMNS, load_day_sums
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+FEATURES = [field.name for field in fields(WindowFeatures)]
+
+# Users whose ID is divisible by this are held out for evaluation
+HOLDOUT_MODULUS = 5
+
+# Shares of held-out days scored below moderate and below high risk
+RISK_LEVEL_QUANTILES = (0.70, 0.90)
+
+# Rows per block when iterating the memory-mapped matrices
+BLOCK_SIZE = 100_000
+
+
+def train_model(chunk_size=None, l2=1.0, max_iter=25, min_rows=100, pointer=None):
+    """
+    Build the labelled dataset, fit the model and publish it under pointer
+    (MODEL_PUBLISH_POINTER by default: CURRENT to serve, CANDIDATE to shadow).
+    Returns the new RiskModel, or None when there is not enough labelled data.
+    """
+    chunk_size = chunk_size or settings.MODEL_TRAINING_CHUNK_SIZE
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        train = _MatrixWriter(Path(tmp) / 'train', len(FEATURES))
+        holdout = _MatrixWriter(Path(tmp) / 'holdout', len(FEATURES))
+        
+        for user_ids in _user_id_chunks(chunk_size):
+            for user_id, matrix, labels in _chunk_examples(user_ids):
+                writer = holdout if user_id % HOLDOUT_MODULUS == 0 else train
+                writer.append(matrix, labels)
+        
+        X_train, y_train = train.open()
+        positives = int(y_train.sum()) if len(y_train) else 0
+        if len(y_train) < min_rows or positives in (0, len(y_train)):
+            logger.warning("Skipping training: %s rows, %s positives", len(y_train), positives)
+            return None
+        
+        mean, scale = _column_stats(X_train)
+        weights = _fit_logistic(X_train, y_train, mean, scale, l2, max_iter)
+        
+        version = f"lr-{timezone.now():%Y%m%d%H%M%S}"
+        model = RiskModel(version, FEATURES, weights, (mean, scale), metadata={
+            'trained_at': timezone.now().isoformat(),
+            'train_rows': len(y_train),
+            'train_positives': positives,
+            'l2': l2,
+        })
+        
+        X_holdout, y_holdout = holdout.open()
+        model.metadata['holdout'] = _evaluate(model, X_holdout, y_holdout)
+        model.metadata['risk_thresholds'] = _risk_thresholds(
+            model, X_holdout if len(y_holdout) else X_train
+        )
+        
+        model.save(artifact_dir() / version)
+        write_pointer(version, pointer or settings.MODEL_PUBLISH_POINTER)
+        logger.info("Published model %s: %s", version, model.metadata)
+        return model
+
+
+def _user_id_chunks(chunk_size):
+    """Yield lists of user IDs, chunk_size at a time."""
+    user_ids = User.objects.order_by('id').values_list('id', flat=True)
+    chunk = []
+    for user_id in user_ids.iterator(chunk_size=chunk_size):
+        chunk.append(user_id)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _chunk_examples(user_ids):
+    """Yield (user_id, feature matrix, labels) for every user in a chunk."""
+    day_sums = load_day_sums(user_ids)
+    
+    onsets = defaultdict(set)
+    onset_rows = MigraineEvent.objects.filter(
+        user_id__in=user_ids
+    ).order_by().annotate(date=TruncDate('start_time')).values_list('user_id', 'date').distinct()
+    for user_id, day in onset_rows:
+        onsets[user_id].add(day)
+    
+    for user_id, days in day_sums.items():
+        matrix, labels = _user_examples(days, onsets[user_id])
+        if len(labels):
+            yield user_id, matrix, labels
+
+
+def _user_examples(days, onset_days):
+    """Turn one user's per-day sums into window features and onset labels."""
+    first_day = min(days)
+    last_day = max([max(days)] + list(onset_days))
+    span = (last_day - first_day).days + 1
+    
+    dense = np.zeros((span, len(DAY_SUM_COLUMNS)))
+    for day, sums in days.items():
+        dense[(day - first_day).days] = [float(sums.get(name) or 0) for name in DAY_SUM_COLUMNS]
+    
+    # cumulative[i] holds the sums of days before index i
+    cumulative = np.vstack([np.zeros(len(DAY_SUM_COLUMNS)), np.cumsum(dense, axis=0)])
+    targets = np.arange(7, span + 1)
+    window = dict(zip(DAY_SUM_COLUMNS, (cumulative[targets] - cumulative[targets - 7]).T))
+    
+    # Only windows with logged days are scored by the engine
+    has_logs = window['log_count'] > 0
+    
+    def average(name):
+        count = window[f'{name}_count']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, window[f'{name}_sum'] / count, np.nan)
+    
+    columns = {
+        'log_count': window['log_count'],
+        'avg_sleep': average('sleep'),
+        'avg_stress': average('stress'),
+        'avg_water': average('water'),
+        'avg_exercise': average('exercise'),
+        'bio_count': window['bio_count'],
+        'avg_hrv': average('hrv'),
+    }
+    matrix = np.column_stack([columns[name] for name in FEATURES])[has_logs]
+    
+    target_days = [first_day + timedelta(days=int(t)) for t in targets[has_logs]]
+    labels = np.array([day in onset_days for day in target_days], dtype=np.uint8)
+    return matrix, labels
+
+
+class _MatrixWriter:
+    """Append-only float64 matrix and uint8 label vector backed by files."""
+    
+    def __init__(self, path, width):
+        self.features_path = path.with_suffix('.features')
+        self.labels_path = path.with_suffix('.labels')
+        self.width = width
+        self.rows = 0
+        self.features_path.touch()
+        self.labels_path.touch()
+    
+    def append(self, matrix, labels):
+        with open(self.features_path, 'ab') as f:
+            np.ascontiguousarray(matrix, dtype=np.float64).tofile(f)
+        with open(self.labels_path, 'ab') as f:
+            np.ascontiguousarray(labels, dtype=np.uint8).tofile(f)
+        self.rows += len(labels)
+    
+    def open(self):
+        """Return memory-mapped (features, labels)."""
+        if not self.rows:
+            return np.empty((0, self.width)), np.empty(0, dtype=np.uint8)
+        features = np.memmap(self.features_path, dtype=np.float64, mode='r', shape=(self.rows, self.width))
+        labels = np.memmap(self.labels_path, dtype=np.uint8, mode='r', shape=(self.rows,))
+        return features, labels
+
+
+def _blocks(rows):
+    for start in range(0, rows, BLOCK_SIZE):
+        yield slice(start, min(start + BLOCK_SIZE, rows))
+
+
+def _column_stats(matrix):
+    """NaN-aware per-column mean and standard deviation, computed blockwise."""
+    total = np.zeros(matrix.shape[1])
+    total_sq = np.zeros(matrix.shape[1])
+    count = np.zeros(matrix.shape[1])
+    
+    for block in _blocks(len(matrix)):
+        values = np.asarray(matrix[block])
+        present = ~np.isnan(values)
+        values = np.where(present, values, 0)
+        total += values.sum(axis=0)
+        total_sq += (values ** 2).sum(axis=0)
+        count += present.sum(axis=0)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, total / count, 0)
+        variance = np.where(count > 0, total_sq / count - mean ** 2, 0)
+    scale = np.sqrt(np.maximum(variance, 0))
+    return mean, np.where(scale > 1e-9, scale, 1.0)
+
+
+def _design(matrix, mean, scale):
+    """Impute, standardize and prepend an intercept column."""
+    values = np.asarray(matrix, dtype=float)
+    values = (np.where(np.isnan(values), mean, values) - mean) / scale
+    return np.hstack([np.ones((len(values), 1)), values])
+
+
+def _fit_logistic(matrix, labels, mean, scale, l2, max_iter, tol=1e-6):
+    """L2-regularized logistic regression via Newton's method over blocks."""
+    width = matrix.shape[1] + 1
+    weights = np.zeros(width)
+    penalty = np.eye(width) * l2
+    penalty[0, 0] = 0  # Do not regularize the intercept
+    
+    for _ in range(max_iter):
+        gradient = penalty @ weights
+        hessian = penalty.copy()
+        
+        for block in _blocks(len(matrix)):
+            design = _design(matrix[block], mean, scale)
+            y = np.asarray(labels[block], dtype=float)
+            p = 1 / (1 + np.exp(-(design @ weights)))
+            gradient += design.T @ (p - y)
+            hessian += (design * (p * (1 - p))[:, None]).T @ design
+        
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.max(np.abs(step)) < tol:
+            break
+    
+    return weights
+
+
+def _evaluate(model, matrix, labels):
+    """Log loss and ROC AUC on held-out rows."""
+    if not len(labels):
+        return {'rows': 0}
+    
+    probabilities = _probabilities(model, matrix)
+    y = np.asarray(labels, dtype=float)
+    eps = 1e-12
+    log_loss = -np.mean(y * np.log(probabilities + eps) + (1 - y) * np.log(1 - probabilities + eps))
+    
+    positives = int(y.sum())
+    metrics = {'rows': len(y), 'positives': positives, 'log_loss': round(float(log_loss), 4)}
+    if 0 < positives < len(y):
+        # Rank-based (Mann-Whitney) AUC
+        ranks = np.empty(len(y))
+        ranks[np.argsort(probabilities, kind='mergesort')] = np.arange(1, len(y) + 1)
+        negatives = len(y) - positives
+        auc = (ranks[y == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives)
+        metrics['auc'] = round(float(auc), 4)
+    
+    return metrics
+
+
+def _risk_thresholds(model, matrix):
+    """
+    Probabilities at RISK_LEVEL_QUANTILES of the given rows, which the served
+    score maps onto the low/moderate/high cut-offs. None if they don't separate.
+    """
+    thresholds = np.quantile(_probabilities(model, matrix), RISK_LEVEL_QUANTILES)
+    if not 0 < thresholds[0] < thresholds[1] < 1:
+        logger.warning("Risk thresholds %s do not separate the levels; scaling probabilities", thresholds)
+        return None
+    return [round(float(threshold), 6) for threshold in thresholds]
+
+
+def _probabilities(model, matrix):
+    return np.concatenate([
+        model.predict_proba_matrix(np.asarray(matrix[block], dtype=float))
+        for block in _blocks(len(matrix))
+    ])
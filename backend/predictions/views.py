@@ -1,60 +1,89 @@
-from rest_framework import viewsets, status
+from adrf import viewsets
+from asgiref.sync import sync_to_async
+from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from datetime import datetime
 from django.db.models import Q
+from migraine_backend.conditional import ConditionalMixin
+from migraine_backend.versions import TODAY
 
+from biometrics.models import Biometrics
+from logs.models import DailyLog
 from .models import Prediction
 from .serializers import PredictionSerializer
 from .ml_engine import MigrainePredictionEngine
+from .scheduling import local_date
+from . import cache as prediction_cache
 
 
-class PredictionViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet for Prediction operations."""
+class PredictionViewSet(ConditionalMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for Prediction operations. The read-heavy dashboard actions are
+    async; the remaining actions run in a worker thread.
+    """
     
     serializer_class = PredictionSerializer
     permission_classes = [IsAuthenticated]
+    conditional_models = {
+        'list': [Prediction],
+        'retrieve': [Prediction],
+        'today': [Prediction, DailyLog, Biometrics, TODAY],
+        'forecast': [DailyLog, Biometrics, TODAY],
+    }
     
     def get_queryset(self):
         return Prediction.objects.filter(user=self.request.user)
     
+    def conditional_extra(self, request):
+        return [MigrainePredictionEngine(request.user).model_version]
+    
     @action(detail=False, methods=['get'])
-    def today(self, request):
+    async def today(self, request):
         """Get today's prediction, generate if doesn't exist."""
-        today = datetime.now().date()
-        
-        # Try to get existing prediction
-        prediction = Prediction.objects.filter(
-            user=request.user,
-            date=today
-        ).first()
+        today = local_date(request.user.timezone)
+        engine = await sync_to_async(MigrainePredictionEngine)(request.user)
         
-        if not prediction:
-            # Generate new prediction
-            engine = MigrainePredictionEngine(request.user)
-            result = engine.predict_risk(today)
-            
-            # Save prediction
-            prediction = Prediction.objects.create(
+        async def load_prediction():
+            # Try to get existing prediction
+            prediction = await Prediction.objects.filter(
                 user=request.user,
-                date=today,
-                risk_score=result['risk_score'],
-                risk_level=result['risk_level'],
-                top_factors=result['top_factors'],
-                confidence=result['confidence'],
-                model_version=result['model_version'],
-                recommendations=result['recommendations']
-            )
+                date=today
+            ).afirst()
+            
+            if not prediction:
+                # Generate new prediction
+                result = await engine.apredict_risk(today)
+                
+                # Save prediction
+                prediction = await Prediction.objects.acreate(
+                    user=request.user,
+                    date=today,
+                    risk_score=result['risk_score'],
+                    risk_level=result['risk_level'],
+                    top_factors=result['top_factors'],
+                    confidence=result['confidence'],
+                    model_version=result['model_version'],
+                    recommendations=result['recommendations']
+                )
+            
+            return dict(self.get_serializer(prediction).data)
         
-        serializer = self.get_serializer(prediction)
-        return Response(serializer.data)
+        data = await prediction_cache.aget_or_compute(
+            request.user.id, 'prediction', today, engine.model_version, load_prediction
+        )
+        return Response(data)
     
     @action(detail=False, methods=['get'])
-    def forecast(self, request):
+    async def forecast(self, request):
         """Get 7-day forecast."""
-        engine = MigrainePredictionEngine(request.user)
-        forecast_data = engine.predict_next_7_days()
+        today = local_date(request.user.timezone)
+        engine = await sync_to_async(MigrainePredictionEngine)(request.user)
+        forecast_data = await prediction_cache.aget_or_compute(
+            request.user.id, 'forecast', today, engine.model_version,
+            sync_to_async(lambda: engine.predict_next_7_days(first_date=today))
+        )
         
         return Response({
             'forecast': forecast_data,
@@ -64,13 +93,16 @@ class PredictionViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['post'])
     def generate(self, request):
         """Manually trigger prediction generation."""
-        target_date = request.data.get('date', datetime.now().date())
+        target_date = request.data.get('date') or local_date(request.user.timezone)
         
         if isinstance(target_date, str):
             target_date = datetime.fromisoformat(target_date).date()
         
         engine = MigrainePredictionEngine(request.user)
-        result = engine.predict_risk(target_date)
+        result = prediction_cache.get_or_compute(
+            request.user.id, 'risk', target_date, engine.model_version,
+            lambda: engine.predict_risk(target_date)
+        )
         
         # Create or update prediction
         prediction, created = Prediction.objects.update_or_create(
@@ -87,4 +119,12 @@ class PredictionViewSet(viewsets.ReadOnlyModelViewSet):
         )
         
         serializer = self.get_serializer(prediction)
+        prediction_cache.store(
+            request.user.id, 'prediction', target_date, engine.model_version, dict(serializer.data)
+        )
         return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Prediction cache hit/miss counters (staff only)."""
+        return Response(prediction_cache.get_stats())